@@ -0,0 +1,54 @@
+import io
+import os.path
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+
+from tools import yaff2cefo
+from tools.yaff import YaffFont, YaffGlyph, save
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.output_dir = os.path.join(directory.name, "out")
+
+    def save(self, name: str, rows: list[str]) -> str:
+        path = os.path.join(self.directory, name)
+        save(YaffFont({"name": name}, [YaffGlyph.from_char("A", rows)]), path)
+        return path
+
+    def main(self, *argv: str) -> tuple[int, list[str]]:
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = yaff2cefo.main([*argv, "-o", self.output_dir, "-j", "1"])
+
+        return status, output.getvalue().splitlines()
+
+    def test_convert(self) -> None:
+        self.save("a.yaff", ["@@", ".@"])
+        self.save("b.yaff", ["@."])
+        status, lines = self.main(os.path.join(self.directory, "*.yaff"))
+        self.assertEqual(status, 0)
+        self.assertTrue(lines[-1].startswith("2 converted, 0 failed, 0 up to date"))
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "a.cefo")))
+
+        status, lines = self.main(os.path.join(self.directory, "*.yaff"))
+        self.assertEqual(status, 0)
+        self.assertTrue(lines[-1].startswith("0 converted, 0 failed, 2 up to date"))
+
+    def test_failed_job(self) -> None:
+        # One bad input is reported, and the other inputs are still converted
+        self.save("a.yaff", ["@"])
+        tall = self.save("b.yaff", ["@"] * 16)
+        self.save("c.yaff", ["@"])
+        status, lines = self.main(os.path.join(self.directory, "*.yaff"),
+                                  os.path.join(self.directory, "missing.yaff"))
+        self.assertEqual(status, 1)
+        self.assertIn(f"FAIL  {tall}: Glyphs taller than 8 pixels cannot be packed into columns", lines)
+        self.assertTrue(lines[-1].startswith("2 converted, 2 failed, 0 up to date"))
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "c.cefo")))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "b.cefo")))
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from tools.build import load_font, parse_target
+
+
+HEAD = "name: Test\nspacing: proportional\n\n"
+
+
+class BuildTest(unittest.TestCase):
+    def setUp(self) -> None:
+        try:
+            import monobit
+        except ImportError:
+            self.skipTest("monobit is not installed")
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache_dir = os.path.join(directory.name, "out", ".cache")
+
+    def write(self, path: str, text: str) -> None:
+        path = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write(text)
+
+    def test_parse_target(self) -> None:
+        target = parse_target(os.path.join("out", "clavis.1250.fon"))
+        self.assertEqual(target.source, os.path.join("out", "clavis.yaff"))
+        self.assertEqual((target.name, target.codepage, target.extension), ("clavis", 1250, ".fon"))
+
+    def test_fragments(self) -> None:
+        # Fragments are only used from an explicitly given directory
+        self.write(os.path.join("out", "test.yaff"), HEAD + "u+0041:\n    @@\n")
+        self.write(os.path.join("test", "head.yaff"), HEAD)
+        self.write(os.path.join("test", "0000-basic.yaff"), "u+0041:\n    @@\n\nu+0042:\n    @.\n")
+        target = parse_target(os.path.join(self.directory, "out", "test.bdf"))
+
+        font = load_font(target, self.cache_dir)
+        self.assertEqual(len(font.glyphs), 1)
+
+        font = load_font(target, self.cache_dir, self.directory)
+        self.assertEqual(len(font.glyphs), 2)
+        self.assertTrue(os.path.isdir(self.cache_dir))
+
+        font = load_font(target, self.cache_dir, os.path.join(self.directory, "out"))
+        self.assertEqual(len(font.glyphs), 1)
@@ -0,0 +1,211 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from tools.cefo import (CelonesFont, CelonesFontWriter, FullGlyphBlock, GlyphBlockBase, SparseGlyphBlock,
+                        iter_chunks, rle_decode, rle_encode)
+
+
+def get_full_block(prefix: int) -> tuple[FullGlyphBlock, bytes]:
+    block = FullGlyphBlock()
+    block.prefix = prefix
+    block.widths = [i % 4 for i in range(16)]
+    return block, bytes(range(sum(block.widths)))
+
+
+def get_sparse_block(prefix: int) -> tuple[SparseGlyphBlock, bytes]:
+    block = SparseGlyphBlock()
+    block.prefix = prefix
+    block.widths = [(1, 2), (5, 0), (9, 3)]
+    return block, b"\x01\x02\x07\x08\x09"
+
+
+class CelonesFontTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(directory.name, "font.cefo")
+
+    def write(self, blocks: list[tuple[FullGlyphBlock | SparseGlyphBlock, bytes]], **options) -> CelonesFont:
+        with CelonesFontWriter(self.path, **options) as writer:
+            for block, bitmap in blocks:
+                writer.write_block(block, bitmap)
+
+        font = CelonesFont()
+        font.load(self.path)
+        return font
+
+    def assertFont(self, font: CelonesFont) -> None:
+        self.assertEqual(bytes(font[0x41]), b"\x00")
+        self.assertEqual(bytes(font[0x43]), bytes(range(3, 6)))
+        self.assertEqual(bytes(font[0x521]), b"\x01\x02")
+        self.assertEqual(bytes(font[0x525]), b"")
+        self.assertEqual(bytes(font[0x529]), b"\x07\x08\x09")
+        self.assertIsNone(font.get_span(0x522))
+        self.assertEqual(len(font.get_index()), 19)
+
+    def test_writer(self) -> None:
+        self.assertFont(self.write([get_sparse_block(0x52), get_full_block(0x4)]))
+        self.assertEqual(os.listdir(self.directory), ["font.cefo"])
+
+    def test_store(self) -> None:
+        font = self.write([get_full_block(0x4), get_sparse_block(0x52)])
+        font.store(self.path)
+        font.load(self.path)
+        self.assertFont(font)
+
+    def test_mapped(self) -> None:
+        font = self.write([get_full_block(0x4), get_sparse_block(0x52)])
+        font.load(self.path, mapped=True)
+        self.assertFont(font)
+
+        # Glyph slices in use keep the mapping alive rather than failing to close it
+        glyph = font[0x529]
+        font.load(self.path, mapped=True)
+        self.assertFont(font)
+        font.close()
+        self.assertEqual(bytes(glyph), b"\x07\x08\x09")
+        self.assertEqual(len(font.get_index()), 0)
+        glyph.release()
+
+    def test_store_mapped(self) -> None:
+        # The mapped file is replaced, not truncated under the mapping
+        font = self.write([get_full_block(0x4), get_sparse_block(0x52)])
+        font.load(self.path, mapped=True)
+        font.store(self.path, index=True)
+        self.assertFont(font)
+        font.load(self.path, mapped=True)
+        self.assertFont(font)
+        font.close()
+        self.assertEqual(sorted(os.listdir(self.directory)), ["font.cefo"])
+
+    def get_chunks(self) -> list[bytes]:
+        with open(self.path, "rb") as cefo:
+            return [fourcc for fourcc, _, _ in iter_chunks(cefo)]
+
+    def test_index(self) -> None:
+        # The acceleration table is only written on request
+        font = self.write([get_full_block(0x4), get_sparse_block(0x52)])
+        self.assertNotIn(b"gidx", self.get_chunks())
+        font.store(self.path)
+        self.assertNotIn(b"gidx", self.get_chunks())
+
+        self.assertFont(self.write([get_full_block(0x4), get_sparse_block(0x52)], index=True))
+        self.assertIn(b"gidx", self.get_chunks())
+        font.store(self.path, index=True)
+        self.assertIn(b"gidx", self.get_chunks())
+        font.load(self.path)
+        self.assertFont(font)
+
+    def test_compression(self) -> None:
+        block, bitmap = get_full_block(0x4)
+        font = self.write([(block, bytes(len(bitmap)))], compress=True)
+        self.assertIn(b"bmpz", self.get_chunks())
+        self.assertEqual(bytes(font[0x4F]), bytes(3))
+
+        font.store(self.path, compress=True)
+        self.assertIn(b"bmpz", self.get_chunks())
+        font.load(self.path)
+        self.assertEqual(bytes(font[0x4F]), bytes(3))
+
+    def test_compression_fallback(self) -> None:
+        # A bitmap that does not get smaller is stored plain
+        font = self.write([get_full_block(0x4), get_sparse_block(0x52)], compress=True)
+        self.assertEqual(self.get_chunks()[0], b"bmp ")
+        self.assertFont(font)
+
+        font.store(self.path, compress=True)
+        self.assertIn(b"bmp ", self.get_chunks())
+        self.assertNotIn(b"bmpz", self.get_chunks())
+        font.load(self.path)
+        self.assertFont(font)
+
+    def test_chunks(self) -> None:
+        # Unknown chunks are skipped
+        self.write([get_full_block(0x4)])
+        with open(self.path, "rb") as cefo:
+            data = cefo.read()
+
+        extra = b"test" + (2).to_bytes(4, "little") + b"xy"
+        data = data[0:4] + (len(data) - 8 + len(extra)).to_bytes(4, "little") + data[8:] + extra
+        self.assertEqual([fourcc for fourcc, _, _ in iter_chunks(io.BytesIO(data))][-1], b"test")
+        with open(self.path, "wb") as cefo:
+            cefo.write(data)
+
+        font = CelonesFont()
+        font.load(self.path)
+        self.assertEqual(bytes(font[0x43]), bytes(range(3, 6)))
+
+    def test_writer_error(self) -> None:
+        # A failed conversion leaves neither a partial nor a temporary file
+        with open(self.path, "wb") as cefo:
+            cefo.write(b"previous")
+
+        with self.assertRaises(RuntimeError):
+            with CelonesFontWriter(self.path) as writer:
+                writer.write_block(*get_full_block(0x4))
+                raise RuntimeError()
+
+        with open(self.path, "rb") as cefo:
+            self.assertEqual(cefo.read(), b"previous")
+
+        os.remove(self.path)
+        with self.assertRaisesRegex(ValueError, "does not fit"):
+            with CelonesFontWriter(self.path) as writer:
+                block, bitmap = get_sparse_block(0x52)
+                writer.write_block(block, bitmap)
+                block.offset = 1 << 16
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_block_base(self) -> None:
+        # Blocks must implement get_glyphs()
+        class Block(GlyphBlockBase):
+            offset_bits = 16
+
+        with self.assertRaises(TypeError):
+            Block()
+
+
+class RunLengthTest(unittest.TestCase):
+    def assertRoundTrip(self, data: bytes) -> bytes:
+        encoded = rle_encode(data)
+        self.assertEqual(rle_decode(encoded, len(data)), data)
+        return encoded
+
+    def test_empty(self) -> None:
+        self.assertEqual(self.assertRoundTrip(b""), b"")
+
+    def test_runs(self) -> None:
+        self.assertEqual(self.assertRoundTrip(b"xx"), b"\xffx")
+        self.assertEqual(self.assertRoundTrip(b"x" * 128), b"\x81x")
+        self.assertEqual(self.assertRoundTrip(b"x" * 129), b"\x81x\x00x")
+        self.assertEqual(self.assertRoundTrip(b"x" * 130), b"\x81x\xffx")
+        # Runs of two inside literals are cheaper left literal
+        self.assertEqual(self.assertRoundTrip(b"axxb"), b"\x03axxb")
+        self.assertEqual(self.assertRoundTrip(b"axxxb"), b"\x00a\xfex\x00b")
+
+    def test_literals(self) -> None:
+        data = bytes(range(129))
+        self.assertEqual(self.assertRoundTrip(data[:1]), b"\x00\x00")
+        self.assertEqual(self.assertRoundTrip(data[:128]), b"\x7f" + data[:128])
+        self.assertEqual(self.assertRoundTrip(data), b"\x7f" + data[:128] + b"\x00\x80")
+
+    def test_random(self) -> None:
+        rng = random.Random(0)
+        for _ in range(200):
+            self.assertRoundTrip(bytes(rng.choice(b"\x00\x01\xff") for _ in range(rng.randrange(300))))
+
+    def test_corrupted(self) -> None:
+        with self.assertRaises(ValueError):
+            rle_decode(b"\x05\x01", 6)
+
+        with self.assertRaises(ValueError):
+            rle_decode(b"\xfex", 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
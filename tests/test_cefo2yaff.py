@@ -0,0 +1,66 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from typing import TextIO
+from unittest import mock
+
+from tools import cefo2yaff
+from tools.cefo import CelonesFont
+from tools.yaff import YaffFont, YaffGlyph, load, save
+from tools.yaff2cefo import convert
+
+
+FONT = YaffFont({"name": "Test"}, [
+    YaffGlyph.from_char("A", ["." * 3] * 7 + ["@.@"]),
+    YaffGlyph.from_char("B", ["@@"] * 8),
+    YaffGlyph.from_char("ą", ["@"] * 8),
+])
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.source = os.path.join(directory.name, "test-bold.cefo")
+        save(FONT, os.path.join(directory.name, "source.yaff"))
+        convert(os.path.join(directory.name, "source.yaff"), self.source)
+
+    def test_yaff(self) -> None:
+        target = os.path.join(self.directory, "target.yaff")
+        cefo2yaff.convert(self.source, target)
+        font = load(target)
+        self.assertEqual(font.properties["name"], "test-bold")
+        self.assertEqual([(glyph.char, glyph.rows) for glyph in font.glyphs],
+                         [(glyph.char, glyph.rows) for glyph in FONT.glyphs])
+
+    def test_bdf(self) -> None:
+        target = os.path.join(self.directory, "target.bdf")
+        cefo2yaff.convert(self.source, target)
+        with open(target, encoding="utf-8") as bdf:
+            self.assertIn("FONT -misc-test bold-medium-r-normal--8-80-75-75-p-20-iso10646-1\n", bdf.read())
+
+        try:
+            import monobit
+        except ImportError:
+            self.skipTest("monobit is not installed")
+
+        # monobit warns about malformed font names
+        with self.assertNoLogs(level=logging.WARNING):
+            font = monobit.load(target).get(0)
+
+        self.assertEqual([glyph.char for glyph in font.glyphs], ["A", "B", "ą"])
+
+    def test_failed_export(self) -> None:
+        # A failed export leaves neither a partial nor a temporary file
+        def write_failing(cefo: CelonesFont, name: str, stream: TextIO) -> None:
+            stream.write("name: partial\n")
+            raise RuntimeError()
+
+        target = os.path.join(self.directory, "target.yaff")
+        with mock.patch.dict(cefo2yaff.WRITERS, {".yaff": write_failing}), self.assertRaises(RuntimeError):
+            cefo2yaff.convert(self.source, target)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ["source.yaff", "test-bold.cefo"])
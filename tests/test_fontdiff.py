@@ -0,0 +1,85 @@
+import io
+import os
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+from unittest import mock
+
+from tools import fontdiff
+from tools.fontdiff import get_glyph_hash, get_index, get_index_path
+from tools.yaff import YaffFont, YaffGlyph, save
+from tools.yaff2cefo import convert
+
+
+def get_font(rows: dict[str, list[str]]) -> YaffFont:
+    return YaffFont({"name": "Test"}, [YaffGlyph.from_char(char, rows) for char, rows in rows.items()])
+
+
+GLYPHS = {
+    "A": [".@."] * 7 + ["@.@"],
+    "B": ["@@"] * 8,
+    "C": ["@"] * 8,
+}
+
+
+class FontDiffTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache_dir = os.path.join(directory.name, "cache")
+        environ = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.cache_dir})
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def save(self, name: str, glyphs: dict[str, list[str]]) -> str:
+        path = os.path.join(self.directory, name)
+        save(get_font(glyphs), path)
+        return path
+
+    def main(self, *argv: str) -> tuple[int, list[str]]:
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = fontdiff.main(list(argv))
+
+        return status, output.getvalue().splitlines()
+
+    def test_glyph_hash(self) -> None:
+        # Blank padding around the ink does not change a glyph
+        self.assertEqual(get_glyph_hash(["000", "010"]), get_glyph_hash(["0100"]))
+        self.assertNotEqual(get_glyph_hash(["010"]), get_glyph_hash(["010", "000"]))
+        self.assertNotEqual(get_glyph_hash(["01"]), get_glyph_hash(["01"], left=1))
+
+    def test_equal(self) -> None:
+        reference = self.save("reference.yaff", GLYPHS)
+        cefo = os.path.join(self.directory, "font.cefo")
+        convert(reference, cefo)
+        self.assertEqual(self.main(reference, cefo), (0, [f"{cefo}: 0 added, 0 removed, 0 changed"]))
+
+    def test_different(self) -> None:
+        reference = self.save("reference.yaff", GLYPHS)
+        font = self.save("font.yaff", {"A": GLYPHS["A"], "B": ["@."] * 8, "D": ["@"]})
+        status, lines = self.main(reference, font)
+        self.assertEqual(status, 1)
+        self.assertEqual(lines, [f"{font}: + U+0044 'D'", f"{font}: - U+0043 'C'", f"{font}: ~ U+0042 'B'",
+                                 f"{font}: 1 added, 1 removed, 1 changed"])
+        self.assertEqual(self.main("-q", reference, font), (1, [f"{font}: 1 added, 1 removed, 1 changed"]))
+
+    def test_cache(self) -> None:
+        reference = self.save("reference.yaff", GLYPHS)
+        index = get_index(reference)
+        self.assertTrue(os.path.exists(get_index_path(reference)))
+        self.assertEqual(get_index(reference), index)
+
+        # The index is rebuilt when the file changes
+        self.save("reference.yaff", {"A": GLYPHS["A"]})
+        self.assertEqual(list(get_index(reference)), [0x41])
+
+    def test_cache_error(self) -> None:
+        # An unwritable cache directory only disables the cache
+        with open(self.cache_dir, "w") as cache_file:
+            cache_file.write("not a directory")
+
+        reference = self.save("reference.yaff", GLYPHS)
+        self.assertEqual(sorted(get_index(reference)), [0x41, 0x42, 0x43])
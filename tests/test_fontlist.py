@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+
+from tools import fontlist
+from tools.fontlist import CACHE_NAME, MetadataCache, probe_bdf, probe_encodings, probe_family
+from tools.yaff import YaffFont, YaffGlyph, save
+
+
+BDF = b"""\
+STARTFONT 2.1
+FONT -misc-test-medium-r-normal--8-80-75-75-p-50-iso8859-2
+SIZE 8 75 75
+FONTBOUNDINGBOX 3 8 0 0
+STARTPROPERTIES 2
+CHARSET_REGISTRY "ISO8859"
+CHARSET_ENCODING "2"
+ENDPROPERTIES
+CHARS 0
+ENDFONT
+"""
+
+
+class FontListTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def save(self, name: str, family: str = "Test") -> str:
+        path = os.path.join(self.directory, name)
+        save(YaffFont({"name": f"{family} 8", "family": family}, [YaffGlyph.from_char("A", ["@@", ".@"])]), path)
+        return path
+
+    def test_probe_bdf(self) -> None:
+        self.assertEqual(probe_bdf(io.BytesIO(BDF)), ["iso8859-2"])
+        self.assertEqual(probe_bdf(io.BytesIO(BDF.replace(b"ISO8859", b"FontSpecific"))), [""])
+
+    def test_probe_fon(self) -> None:
+        try:
+            import monobit
+        except ImportError:
+            self.skipTest("monobit is not installed")
+
+        font = monobit.load(self.save("test.yaff")).get(0).modify(encoding="windows-1250")
+        path = os.path.join(self.directory, "test.fon")
+        monobit.save(font, path, format="mzfon")
+        self.assertEqual(probe_encodings(path), ["windows-1250"])
+
+    def test_probe_family(self) -> None:
+        self.assertEqual(probe_family(self.save("test.yaff", "Gidotto")), "Gidotto")
+
+    def test_cache(self) -> None:
+        paths = [self.save("a.yaff", "A"), self.save("b.yaff", "B")]
+        probed = list()
+
+        def probe(path: str) -> str:
+            probed.append(path)
+            return probe_family(path)
+
+        cache = MetadataCache(self.directory)
+        self.assertEqual(cache.get_many("families", paths, probe), {paths[0]: "A", paths[1]: "B"})
+        cache.save()
+
+        # Cached entries are reused until their file changes
+        cache = MetadataCache(self.directory)
+        self.assertEqual(cache.get_many("families", paths, probe), {paths[0]: "A", paths[1]: "B"})
+        self.assertEqual(len(probed), 2)
+        self.save("b.yaff", "Changed")
+        self.assertEqual(cache.get_many("families", paths, probe)[paths[1]], "Changed")
+        self.assertEqual(probed[2:], [paths[1]])
+
+        # Each kind of probe has its own entries
+        self.assertEqual(cache.get_many("encodings", paths, lambda path: ["cp437"]),
+                         {paths[0]: ["cp437"], paths[1]: ["cp437"]})
+        self.assertEqual(cache.get_many("families", paths, probe)[paths[0]], "A")
+
+    def test_removed_file(self) -> None:
+        paths = [self.save("a.yaff"), os.path.join(self.directory, "missing.yaff")]
+        cache = MetadataCache(self.directory)
+        self.assertEqual(list(cache.get_many("families", paths, probe_family)), paths[:1])
+
+        def probe(path: str) -> str:
+            os.remove(path)
+            return probe_family(path)
+
+        self.assertEqual(cache.get_many("families", [self.save("b.yaff")], probe), {})
+
+    def test_old_cache(self) -> None:
+        path = self.save("a.yaff", "A")
+        with open(os.path.join(self.directory, CACHE_NAME), "w", encoding="utf-8") as cache_file:
+            json.dump({path: {"stamp": MetadataCache(self.directory).get_stamp(path), "data": ["cp437"]}}, cache_file)
+
+        self.assertEqual(MetadataCache(self.directory).get_many("families", [path], probe_family), {path: "A"})
+
+    def test_main(self) -> None:
+        # x.1250.yaff is both a font and a variant of x.yaff
+        self.save("x.yaff", "Gidotto")
+        self.save("x.1250.yaff", "Gidotto")
+        with open(os.path.join(self.directory, "x.bdf"), "wb") as bdf:
+            bdf.write(BDF)
+
+        for _ in range(2):
+            output = io.StringIO()
+            with redirect_stdout(output):
+                fontlist.main([self.directory])
+
+            lines = output.getvalue().splitlines()
+            self.assertEqual(len(lines), 2)
+            self.assertEqual(lines[1], "- Gidotto - BDF (ISO8859-2), YAFF, YAFF")
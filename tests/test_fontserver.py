@@ -0,0 +1,149 @@
+import asyncio
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+from contextlib import redirect_stdout
+
+from tools.cefo import CelonesFontWriter
+from tools.fontserver import MAX_RENDER_WIDTH, MAX_RENDERERS, FontRegistry, handle_request, watch
+
+from .test_cefo import get_full_block
+
+
+YAFF = b"name: Test\n\nu+0041:\n    @@\n    .@\n"
+
+
+class FontRegistryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "font.cefo")
+        self.yaff_path = os.path.join(directory.name, "font.yaff")
+        with CelonesFontWriter(self.path) as writer:
+            writer.write_block(*get_full_block(0x4))
+
+        with open(self.path, "rb") as cefo:
+            self.data = cefo.read()
+
+        self.registry = FontRegistry()
+        self.registry.add("font", self.path)
+        self.stamp = 1_000_000_000
+
+    def replace(self, data: bytes, path: str | None = None) -> None:
+        # Each version gets a new modification time, as writes may share one
+        path = path if path is not None else self.path
+        with open(path, "wb") as stream:
+            stream.write(data)
+
+        self.stamp += 1_000_000_000
+        os.utime(path, ns=(self.stamp, self.stamp))
+
+    def reload(self) -> tuple[list[str], list[str]]:
+        output = io.StringIO()
+        with redirect_stdout(output):
+            reloaded = self.registry.reload()
+
+        return reloaded, output.getvalue().splitlines()
+
+    def test_reload(self) -> None:
+        self.assertEqual(self.reload(), ([], []))
+        self.replace(self.data)
+        self.assertEqual(self.reload(), (["font"], []))
+
+    def test_failed_reload(self) -> None:
+        # A broken file is reported once and the previous version is kept
+        font = self.registry.get("font").font
+        self.replace(b"broken")
+        self.assertEqual(self.reload(), ([], ["RELOAD font: File is not RIFF"]))
+        self.assertEqual(self.reload(), ([], []))
+        self.assertIs(self.registry.get("font").font, font)
+        self.assertEqual(bytes(font[0x43]), bytes(range(3, 6)))
+
+        os.remove(self.path)
+        self.assertEqual(len(self.reload()[1]), 1)
+        self.assertEqual(self.reload(), ([], []))
+
+        self.replace(self.data)
+        self.assertEqual(self.reload(), (["font"], []))
+        self.assertIsNot(self.registry.get("font").font, font)
+
+    def test_empty_font(self) -> None:
+        # A font caught while being written does not replace the served one
+        self.replace(b"RIFF" + (4).to_bytes(4, "little") + b"CeFo")
+        self.assertEqual(self.reload(), ([], ["RELOAD font: Font has no glyphs"]))
+        self.assertEqual(bytes(self.registry.get("font").font[0x43]), bytes(range(3, 6)))
+
+    def test_malformed_yaff(self) -> None:
+        # Errors raised by monobit for malformed sources do not stop reloading
+        self.replace(YAFF, self.yaff_path)
+        self.registry.add("yaff", self.yaff_path)
+        font = self.registry.get("yaff").font
+
+        self.replace(b"name: Broken\n\n0x41:\n    @@\n", self.yaff_path)
+        reloaded, lines = self.reload()
+        self.assertEqual(reloaded, [])
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith("RELOAD yaff: "))
+
+        self.replace(b"", self.yaff_path)
+        self.assertEqual(self.reload(), ([], ["RELOAD yaff: Font has no glyphs"]))
+        self.assertIs(self.registry.get("yaff").font, font)
+
+        self.replace(YAFF, self.yaff_path)
+        self.assertEqual(self.reload(), (["yaff"], []))
+
+    def test_render_limits(self) -> None:
+        def request(**params) -> dict:
+            return handle_request(self.registry, dict(op="render", font="font", text="AB", **params))
+
+        self.assertEqual(request(spacing=1, width=6), {"result": "000001020000"})
+        self.assertEqual(request(offset=-2, width=3), {"result": "000000"})
+        for params in [dict(spacing=-1), dict(spacing=1000), dict(spacing="1"), dict(width=10 ** 12),
+                       dict(offset=-10 ** 12), dict(width=MAX_RENDER_WIDTH + 1), dict(width=True)]:
+            self.assertIn("error", request(**params), params)
+
+        # Only a few renderers are kept per font
+        for spacing in range(16):
+            request(spacing=spacing)
+
+        self.assertEqual(list(self.registry.get("font")._renderers), list(range(16 - MAX_RENDERERS, 16)))
+
+    def test_watch(self) -> None:
+        async def run() -> None:
+            watcher = asyncio.create_task(watch(self.registry, 0.01))
+            self.replace(self.data)
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if "RELOAD font" in output.getvalue():
+                    break
+
+            watcher.cancel()
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            asyncio.run(run())
+
+        self.assertEqual(output.getvalue().splitlines(), ["RELOAD font"])
+
+    def test_watch_thread(self) -> None:
+        # Reloads run in a worker thread, so the event loop goes on meanwhile
+        released = threading.Event()
+        waits = list()
+
+        def reload() -> list[str]:
+            waits.append(released.wait(2))
+            return []
+
+        self.registry.reload = reload
+
+        async def run() -> None:
+            watcher = asyncio.create_task(watch(self.registry, 0))
+            await asyncio.sleep(0.05)
+            released.set()
+            watcher.cancel()
+
+        asyncio.run(run())
+        self.assertTrue(waits[0])
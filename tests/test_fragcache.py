@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+try:
+    from tools import fragcache
+except ImportError:
+    fragcache = None
+
+
+HEAD = b"name: Test\nspacing: proportional\n\n"
+FRAGMENT = b"u+0041:\n    @@\n    .@\n\nu+0042:\n    @.@\n"
+
+
+@unittest.skipIf(fragcache is None, "monobit is not installed")
+class FragmentCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache_dir = os.path.join(directory.name, "cache")
+        self.path = os.path.join(directory.name, "0000-basic.yaff")
+        with open(self.path, "wb") as fragment_file:
+            fragment_file.write(FRAGMENT)
+
+    def assertGlyphs(self, glyphs: list) -> None:
+        self.assertEqual([glyph.as_text() for glyph in glyphs], ["@@\n.@\n", "@.@\n"])
+
+    def test_round_trip(self) -> None:
+        glyphs = list(fragcache.parse_yaff(HEAD + FRAGMENT).glyphs)
+        self.assertGlyphs(fragcache.decode_glyphs(fragcache.encode_glyphs(glyphs)))
+
+    def test_corrupted(self) -> None:
+        data = fragcache.encode_glyphs(list(fragcache.parse_yaff(HEAD + FRAGMENT).glyphs))
+        for corrupted in [data[:-1], data + b"\0", data[:12], b"", b"YFC0" + data[4:]]:
+            with self.assertRaises(ValueError):
+                fragcache.decode_glyphs(corrupted)
+
+    def test_load_fragment(self) -> None:
+        self.assertGlyphs(fragcache.load_fragment(HEAD, self.path, self.cache_dir))
+        entries = os.listdir(self.cache_dir)
+        self.assertEqual(len(entries), 1)
+        self.assertTrue(entries[0].endswith(".bin"))
+
+        # A truncated entry is parsed again and replaced
+        entry = os.path.join(self.cache_dir, entries[0])
+        with open(entry, "rb") as cache_file:
+            data = cache_file.read()
+
+        with open(entry, "wb") as cache_file:
+            cache_file.write(data[:-1])
+
+        self.assertGlyphs(fragcache.load_fragment(HEAD, self.path, self.cache_dir))
+        with open(entry, "rb") as cache_file:
+            self.assertEqual(cache_file.read(), data)
+
+        self.assertEqual(os.listdir(self.cache_dir), entries)
@@ -0,0 +1,42 @@
+import unittest
+
+from tools.measure import TextMetrics
+from tools.packedfont import PackedFont
+
+
+class TextMetricsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # One pixel wide letters and space, and a wide W
+        self.font = PackedFont.from_glyphs([(ord(char), b"\x01") for char in " abcd"] + [(ord("W"), bytes(3))])
+
+    def test_measure(self) -> None:
+        metrics = TextMetrics(self.font, 1)
+        self.assertEqual(metrics.get_widths("aW?"), [1, 3, 0])
+        self.assertEqual(metrics.measure("aW"), 5)
+        self.assertEqual(metrics.measure(""), 0)
+        self.assertEqual(metrics.measure_many(["a", "aa", "W a"]), [1, 3, 7])
+        self.assertEqual(metrics.get_prefix_widths("aW"), [0, 1, 5])
+
+    def test_break_greedy(self) -> None:
+        metrics = TextMetrics(self.font)
+        self.assertEqual(metrics.break_lines("aaa bb cc ddddd", 6), ["aaa bb", "cc", "ddddd"])
+        self.assertEqual(metrics.break_lines("aaa bb cc ddddd", 15), ["aaa bb cc ddddd"])
+
+    def test_break_optimal(self) -> None:
+        # Squared slack of 0 + 16 on the greedy lines, against 9 + 1
+        metrics = TextMetrics(self.font)
+        self.assertEqual(metrics.break_lines("aaa bb cc ddddd", 6, optimal=True), ["aaa", "bb cc", "ddddd"])
+        self.assertEqual(metrics.break_lines("aaa bb cc ddddd", 15, optimal=True), ["aaa bb cc ddddd"])
+
+    def test_break_lines(self) -> None:
+        # Spacing counts between glyphs, not after the last one of a line
+        metrics = TextMetrics(self.font, 1)
+        for optimal in [False, True]:
+            self.assertEqual(metrics.break_lines("aa bb\n\ncc", 5, optimal), ["aa", "bb", "", "cc"])
+            self.assertEqual(metrics.break_lines("aa b", 7, optimal), ["aa b"])
+            self.assertEqual(metrics.break_lines("aa b", 6, optimal), ["aa", "b"])
+
+            # Words wider than the line are kept whole on their own line
+            self.assertEqual(metrics.break_lines("aaaaaaaa b", 3, optimal), ["aaaaaaaa", "b"])
+
+        self.assertEqual(metrics.break_lines_many(["aa b", "W"], 6), [["aa", "b"], ["W"]])
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+
+from tools.cefo import CelonesFont, CelonesFontWriter
+from tools.packedfont import PackedFont
+
+from .test_cefo import get_full_block, get_sparse_block
+
+
+class PackedFontTest(unittest.TestCase):
+    def test_from_glyphs(self) -> None:
+        font = PackedFont.from_glyphs([(0x42, b"\x01\x02"), (0x41, b"\x03"), (0x100, b"")])
+        self.assertEqual(list(font.codepoints), [0x41, 0x42, 0x100])
+        self.assertEqual(bytes(font.bitmap), b"\x03\x01\x02")
+        self.assertEqual(font.get_span(0x42), (1, 3))
+        self.assertIsNone(font.get_span(0x43))
+        self.assertEqual([bytes(bitmap) for bitmap in font.lookup_many("AxB")], [b"\x03", b"", b"\x01\x02"])
+        self.assertEqual([prefix for prefix, _, _ in font.iter_blocks()], [0x4, 0x10])
+
+        with self.assertRaises(ValueError):
+            font.append(0x42, b"")
+
+    def test_from_cefo(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "font.cefo")
+            with CelonesFontWriter(path) as writer:
+                writer.write_block(*get_sparse_block(0x52))
+                writer.write_block(*get_full_block(0x4))
+
+            cefo = CelonesFont()
+            cefo.load(path)
+
+        font = PackedFont.from_cefo(cefo)
+        self.assertEqual(list(font.codepoints), sorted(cefo.get_index()))
+        for codepoint in [*range(0x40, 0x50), *range(0x520, 0x530)]:
+            self.assertEqual(font.get_span(codepoint), cefo.get_span(codepoint), hex(codepoint))
+            self.assertEqual(bytes(font[codepoint]), bytes(cefo[codepoint]))
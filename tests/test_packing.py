@@ -0,0 +1,53 @@
+import random
+import unittest
+
+from tools import packing
+from tools.packing import COLUMN_HEIGHT, NUMPY_MIN_BATCH, get_numpy, pack_columns, unpack_columns
+
+
+def get_matrices(rng: random.Random, count: int) -> list[list[list[int]]]:
+    # Odd heights and widths, with empty glyphs among them
+    matrices = list()
+    for _ in range(count):
+        height, width = rng.randint(0, COLUMN_HEIGHT), rng.randint(0, 15)
+        matrices.append([[rng.randint(0, 1) for _ in range(width)] for _ in range(height)])
+
+    return matrices
+
+
+class PackingTest(unittest.TestCase):
+    def test_pack(self) -> None:
+        self.assertEqual(pack_columns([[[1, 0, 1], [0, 1, 1]], [], [[1]] * 8]), [b"\x01\x02\x03", b"", b"\xff"])
+        self.assertEqual(unpack_columns([b"\x01\x02\x03"], 2), [("101", "011")])
+
+        with self.assertRaises(ValueError):
+            pack_columns([[[1]] * 9])
+
+    def test_numpy(self) -> None:
+        # Batches on both sides of the threshold give the same bytes and rows
+        if get_numpy() is None:
+            self.skipTest("NumPy is not installed")
+
+        rng = random.Random(0)
+        for count in [1, NUMPY_MIN_BATCH - 1, NUMPY_MIN_BATCH, NUMPY_MIN_BATCH + 1]:
+            matrices = get_matrices(rng, count)
+            expected = [packing._pack_matrix(pixels) for pixels in matrices]
+            self.assertEqual(packing._pack_matrices_numpy(matrices), expected, count)
+            self.assertEqual(pack_columns(matrices), expected, count)
+
+            for height in [1, 5, COLUMN_HEIGHT]:
+                rows = [packing._unpack_bitmap(bitmap, height) for bitmap in expected]
+                self.assertEqual(packing._unpack_bitmaps_numpy(expected, height), rows, (count, height))
+                self.assertEqual(unpack_columns(expected, height), rows, (count, height))
+
+    def test_numpy_heights(self) -> None:
+        # Batches of the same odd height, which NumPy does not pad
+        if get_numpy() is None:
+            self.skipTest("NumPy is not installed")
+
+        rng = random.Random(1)
+        for height in [1, 3, 7]:
+            matrices = [[[rng.randint(0, 1) for _ in range(width)] for _ in range(height)]
+                        for width in (rng.randint(1, 9) for _ in range(NUMPY_MIN_BATCH))]
+            self.assertEqual(pack_columns(matrices), [packing._pack_matrix(pixels) for pixels in matrices])
+            self.assertEqual(pack_columns(matrices[:-1]), [packing._pack_matrix(pixels) for pixels in matrices[:-1]])
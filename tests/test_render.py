@@ -0,0 +1,90 @@
+import unittest
+
+from tools.packedfont import PackedFont
+from tools.packing import get_numpy
+from tools.render import RunCache, TextRenderer
+
+
+class RunCacheTest(unittest.TestCase):
+    def test_eviction(self) -> None:
+        # Least recently used runs are evicted by total size
+        cache = RunCache(8)
+        cache.put("a", bytes(3))
+        cache.put("b", bytes(3))
+        self.assertEqual(cache.get("a"), bytes(3))
+        cache.put("c", bytes(4))
+        self.assertEqual((len(cache), cache.size), (2, 7))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+
+        cache.put("c", bytes(5))
+        self.assertEqual((len(cache), cache.size), (2, 8))
+        cache.put("d", bytes(8))
+        self.assertEqual((len(cache), cache.size), (1, 8))
+        self.assertIsNone(cache.get("a"))
+
+    def test_oversized(self) -> None:
+        cache = RunCache(4)
+        cache.put("a", bytes(2))
+        cache.put("b", bytes(5))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), bytes(2))
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.size), (0, 0))
+
+
+class TextRendererTest(unittest.TestCase):
+    def setUp(self) -> None:
+        font = PackedFont.from_glyphs([(0x41, b"\x01\x02"), (0x42, b"\x84")])
+        self.renderer = TextRenderer(font, 1)
+
+    def test_render(self) -> None:
+        self.assertEqual(self.renderer.render("AB"), b"\x01\x02\x00\x84")
+        self.assertEqual(self.renderer.render("A?B"), b"\x01\x02\x00\x00\x84")
+        self.assertEqual(self.renderer.render(""), b"")
+        self.assertEqual(len(self.renderer.cache), 3)
+
+    def test_clipping(self) -> None:
+        # Columns outside of the run are blank
+        render = self.renderer.render
+        self.assertEqual(render("AB", 1, 2), b"\x02\x00")
+        self.assertEqual(render("AB", -2, 3), b"\x00\x00\x01")
+        self.assertEqual(render("AB", 3, 4), b"\x84\x00\x00\x00")
+        self.assertEqual(render("AB", 10, 2), b"\x00\x00")
+        self.assertEqual(render("AB", 10), b"")
+        self.assertEqual(render("AB", -6, 2), b"\x00\x00")
+        self.assertEqual(render("AB", 1, 0), b"")
+
+    def test_render_array(self) -> None:
+        if get_numpy() is None:
+            self.skipTest("NumPy is not installed")
+
+        pixels = self.renderer.render_array("AB", 1, 3)
+        self.assertEqual(pixels.shape, (8, 3))
+        self.assertEqual([tuple(row) for row in pixels.nonzero()], [(1, 2, 7), (0, 2, 2)])
+
+    def test_draw(self) -> None:
+        numpy = get_numpy()
+        if numpy is None:
+            self.skipTest("NumPy is not installed")
+
+        # Text is clipped to the framebuffer on all sides
+        framebuffer = numpy.zeros((10, 6), dtype=numpy.uint8)
+        self.renderer.draw(framebuffer, "AB", x=-1, y=3)
+        self.assertEqual([tuple(row) for row in framebuffer.nonzero()], [(4, 5), (0, 2)])
+
+        framebuffer[:] = 0
+        self.renderer.draw(framebuffer, "AB", x=4, y=-1)
+        self.assertEqual([tuple(row) for row in framebuffer.nonzero()], [(0,), (5,)])
+
+        framebuffer[:] = 0
+        for x, y in [(6, 0), (0, 10), (0, -8), (-4, 0)]:
+            self.renderer.draw(framebuffer, "AB", x, y)
+
+        self.assertFalse(framebuffer.any())
+
+        # Pixels are added to what the framebuffer holds
+        framebuffer[0, 0] = 1
+        self.renderer.draw(framebuffer, "B", x=0, y=0)
+        self.assertEqual([tuple(row) for row in framebuffer.nonzero()], [(0, 2, 7), (0, 0, 0)])
@@ -0,0 +1,43 @@
+import unittest
+
+try:
+    from tools.fragcache import parse_yaff
+    from tools.resample import CodepageResampler
+except ImportError:
+    CodepageResampler = None
+
+
+FONT = b"name: Test\nspacing: proportional\n\nu+0041:\n    @@\n    .@\n\nu+00e9:\n    @.@\n\nu+003f:\n    .@\n    @.\n"
+
+
+@unittest.skipIf(CodepageResampler is None, "monobit is not installed")
+class CodepageResamplerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.resampler = CodepageResampler(parse_yaff(FONT))
+
+    def test_resample(self) -> None:
+        # Glyphs are relabelled with the code page's code points
+        for codepage, codepoint in [(437, 0x82), (1250, 0xe9)]:
+            font = self.resampler.resample(codepage)
+            self.assertEqual(font.get_glyph(codepoint=0x41).as_text(), "@@\n.@\n")
+            self.assertEqual(font.get_glyph(codepoint=codepoint).as_text(), "@.@\n")
+            self.assertEqual(font.get_glyph(codepoint=codepoint).char, "é")
+
+    def test_default_glyph(self) -> None:
+        # Characters the font lacks get the default glyph
+        font = self.resampler.resample(437)
+        self.assertEqual(len(font.glyphs), 256)
+        self.assertEqual(font.get_glyph(codepoint=0x42).as_text(), self.resampler.get_default_glyph().as_text())
+        self.assertEqual(font.get_glyph(codepoint=0x42).char, "B")
+
+    def test_missing(self) -> None:
+        missing = self.resampler.get_missing(437)
+        self.assertIn("B", missing)
+        self.assertIn("☺", missing)
+        self.assertNotIn("\x00", missing)
+        for char in "Aé?":
+            self.assertNotIn(char, missing)
+
+        # ą is only in the second code page
+        self.assertNotIn("ą", missing)
+        self.assertIn("ą", self.resampler.get_missing(1250))
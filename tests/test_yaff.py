@@ -0,0 +1,50 @@
+import io
+import os.path
+import tempfile
+import unittest
+
+from tools.yaff import YaffError, YaffFont, YaffGlyph, load_font, read, write
+
+
+class YaffTest(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        font = YaffFont({"name": "Test", "notice": "First line\nSecond line"}, [
+            YaffGlyph.from_char("A", [".@.", "@.@"]),
+            YaffGlyph.from_char("'", ["@"]),
+            YaffGlyph.from_char(" ", []),
+        ])
+        stream = io.StringIO()
+        write(font, stream)
+        stream.seek(0)
+        loaded = read(stream)
+        self.assertEqual(loaded.properties, font.properties)
+        self.assertEqual([(glyph.labels, glyph.rows) for glyph in loaded.glyphs],
+                         [(glyph.labels, glyph.rows) for glyph in font.glyphs])
+
+    def test_multiline_property(self) -> None:
+        font = read(io.StringIO("name: Test\nnotice:\n    First line\n    Second line\n\nempty:\n"))
+        self.assertEqual(font.properties, {"name": "Test", "notice": "First line\nSecond line", "empty": ""})
+
+    def test_tag_label(self) -> None:
+        # A tag label of the first glyph is not a property holding its raster
+        with self.assertRaises(YaffError):
+            read(io.StringIO("name: Tagged\n\ndefault:\n    .@.\n    @.@\n"))
+
+        with self.assertRaises(YaffError):
+            read(io.StringIO("name: Tagged\nspace:\n    -\n"))
+
+    def test_load_font_fallback(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tagged.yaff")
+            with open(path, "w", encoding="utf-8") as stream:
+                stream.write("name: Tagged\nspacing: proportional\n\ndefault:\n    .@.\n    @.@\n\n"
+                             "u+0041:\n    @@\n    @@\n")
+
+            try:
+                import monobit
+            except ImportError:
+                self.skipTest("monobit is not installed")
+
+            font = load_font(path)
+            self.assertIsInstance(font, monobit.Font)
+            self.assertEqual(len(font.glyphs), 2)
@@ -0,0 +1,120 @@
+import io
+import os.path
+import tempfile
+import time
+import unittest
+
+from contextlib import redirect_stdout
+
+from tools.bench import PRESETS, generate_font
+from tools.cefo import CelonesFont, FullGlyphBlock, SparseGlyphBlock
+from tools.packing import pack_columns
+from tools.yaff import YaffFont, YaffGlyph, save
+from tools.yaff2cefo import convert, read_corpus_codepoints
+
+
+# A full Basic Multilingual Plane font converts in a few seconds; the former
+# quadratic encoder took minutes
+TIME_BUDGET = 30.0
+
+
+class ConvertTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = os.path.join(directory.name, "font.yaff")
+        self.target = os.path.join(directory.name, "font.cefo")
+
+    def convert(self, font: YaffFont) -> CelonesFont:
+        save(font, self.source)
+        convert(self.source, self.target)
+        cefo = CelonesFont()
+        cefo.load(self.target)
+        return cefo
+
+    def assertGlyphs(self, cefo: CelonesFont, font: YaffFont) -> None:
+        bitmaps = pack_columns(glyph.as_matrix() for glyph in font.glyphs)
+        self.assertEqual(sorted(cefo.get_index()), sorted(ord(glyph.char) for glyph in font.glyphs))
+        for glyph, bitmap in zip(font.glyphs, bitmaps):
+            self.assertEqual(bytes(cefo[ord(glyph.char)]), bitmap, glyph.labels[0])
+
+    def test_glyphs(self) -> None:
+        font = YaffFont({"name": "Test"}, [
+            YaffGlyph.from_char("A", [".@.", "@.@", "@@@", "@.@"]),
+            YaffGlyph.from_char("B", ["@@.", "@@@", "@.@", "@@."]),
+            YaffGlyph.from_char("ą", ["@@", ".@"]),
+            YaffGlyph.from_char(" ", []),
+        ])
+        self.assertGlyphs(self.convert(font), font)
+
+    def test_block_kinds(self) -> None:
+        # Full blocks cannot mark missing glyphs, so incomplete blocks are sparse
+        font = YaffFont({"name": "Test"}, [YaffGlyph.from_char(chr(codepoint), ["@" * (codepoint % 7)])
+                                           for codepoint in [*range(0x30, 0x40), *range(0x40, 0x4F), 0x41 + 0x40]])
+        cefo = self.convert(font)
+        self.assertIsInstance(cefo.blocks[0x3], FullGlyphBlock)
+        self.assertIsInstance(cefo.blocks[0x4], SparseGlyphBlock)
+        self.assertIsInstance(cefo.blocks[0x8], SparseGlyphBlock)
+        self.assertGlyphs(cefo, font)
+
+    def test_sparse_offset_range(self) -> None:
+        # Sparse blocks store 16-bit bitmap offsets
+        glyphs = [YaffGlyph.from_char(chr(codepoint), ["@" * 15]) for codepoint in range(0x100, 0x100 + 16 * 274)]
+        glyphs.append(YaffGlyph.from_char(chr(0x3000), ["@"]))
+        save(YaffFont({"name": "Test"}, glyphs), self.source)
+        with self.assertRaisesRegex(ValueError, "does not fit in 16 bits"):
+            convert(self.source, self.target)
+
+    def write_corpus(self, name: str, text: str) -> str:
+        path = os.path.join(os.path.dirname(self.source), name)
+        with open(path, "w", encoding="utf-8") as corpus:
+            corpus.write(text)
+
+        return path
+
+    def test_subset(self) -> None:
+        # Only the glyphs used by the corpora are kept, and the fallback glyph
+        font = YaffFont({"name": "Test"}, [YaffGlyph.from_char(char, ["@" * (i + 1)])
+                                           for i, char in enumerate("?ABCąż")])
+        save(font, self.source)
+        corpora = [self.write_corpus("a.txt", "BAB\n"), self.write_corpus("b.txt", "ą€")]
+        subset = read_corpus_codepoints(corpora)
+        self.assertEqual(subset, set(map(ord, "?AB\ną€")))
+
+        with redirect_stdout(io.StringIO()):
+            convert(self.source, self.target, subset=subset)
+
+        cefo = CelonesFont()
+        cefo.load(self.target)
+        self.assertGlyphs(cefo, YaffFont({"name": "Test"}, [glyph for glyph in font.glyphs if glyph.char in "?ABą"]))
+
+    def test_subset_fallback(self) -> None:
+        font = YaffFont({"name": "Test"}, [YaffGlyph.from_char("A", ["@"]), YaffGlyph.from_char("B", ["@@"])])
+        save(font, self.source)
+        corpora = [self.write_corpus("a.txt", "B")]
+        with self.assertRaisesRegex(ValueError, "the fallback glyph '\\?' is missing"):
+            convert(self.source, self.target, subset=read_corpus_codepoints(corpora))
+
+        self.assertFalse(os.path.exists(self.target))
+        with redirect_stdout(io.StringIO()):
+            convert(self.source, self.target, subset=read_corpus_codepoints(corpora, "A"), fallback="A")
+
+        cefo = CelonesFont()
+        cefo.load(self.target)
+        self.assertEqual(sorted(cefo.get_index()), [0x41, 0x42])
+
+    def test_large_font(self) -> None:
+        font = generate_font(PRESETS["bmp"])
+        save(font, self.source)
+
+        start = time.perf_counter()
+        convert(self.source, self.target)
+        self.assertLess(time.perf_counter() - start, TIME_BUDGET)
+
+        cefo = CelonesFont()
+        cefo.load(self.target)
+        self.assertGlyphs(cefo, font)
+
+
+if __name__ == "__main__":
+    unittest.main()
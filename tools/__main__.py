@@ -0,0 +1,6 @@
+import sys
+
+from .fonttool import main
+
+
+sys.exit(main(prog="python -m tools"))
@@ -0,0 +1,141 @@
+import os.path
+import time
+
+from argparse import ArgumentParser, Namespace
+from glob import glob
+from typing import Callable, Iterable, NamedTuple
+
+
+# Batch conversion shared by the converters: inputs are file names, globs
+# and manifests (one path or glob per line, '#' starts a comment),
+# outputs go to a directory under the input name with a new extension.
+class Job(NamedTuple):
+    source: str
+    target: str
+
+
+class Result(NamedTuple):
+    job: Job
+    seconds: float | None
+    error: str | None = None
+
+
+def read_manifest(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as manifest_file:
+        lines = (line.partition("#")[0].strip() for line in manifest_file)
+        base = os.path.dirname(path)
+        return [os.path.join(base, line) for line in lines if len(line) != 0]
+
+
+def expand_inputs(patterns: Iterable[str], manifests: Iterable[str] = ()) -> list[str]:
+    patterns = list(patterns)
+    for manifest in manifests:
+        patterns.extend(read_manifest(manifest))
+
+    # Patterns without matches are kept, so missing files are reported
+    paths = dict()
+    for pattern in patterns:
+        for path in sorted(glob(pattern)) or [pattern]:
+            paths.setdefault(path, None)
+
+    return list(paths)
+
+
+def get_jobs(sources: Iterable[str], output_dir: str, extension: str) -> list[Job]:
+    return [Job(source, os.path.join(output_dir, os.path.splitext(os.path.basename(source))[0] + extension))
+            for source in sources]
+
+
+def is_outdated(job: Job) -> bool:
+    if not os.path.exists(job.target):
+        return True
+
+    return os.path.getmtime(job.target) < os.path.getmtime(job.source)
+
+
+def run_job(convert: Callable[[str, str], object], job: Job) -> Result:
+    # Errors are returned, so one bad input does not stop the other jobs
+    start = time.perf_counter()
+    try:
+        convert(job.source, job.target)
+    except Exception as error:
+        return Result(job, None, str(error) or type(error).__name__)
+
+    return Result(job, time.perf_counter() - start)
+
+
+def run(convert: Callable[[str, str], object], jobs: Iterable[Job], workers: int | None = None, force: bool = False) -> Iterable[Result]:
+    # Up-to-date outputs are reported with no time, failed ones with an error
+    pending = list()
+    for job in jobs:
+        if force or is_outdated(job):
+            pending.append(job)
+        else:
+            yield Result(job, None)
+
+    if len(pending) == 0:
+        return
+
+    # The pool is imported here, as single conversions do not need it
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_job, convert, job) for job in pending]
+        for job, future in zip(pending, futures):
+            try:
+                yield future.result()
+            except Exception as error:
+                yield Result(job, None, str(error) or type(error).__name__)
+
+
+# Command line
+def add_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="convert all inputs into this directory (input and output are given otherwise)")
+    parser.add_argument("-m", "--manifest", action="append", default=[],
+                        help="file listing input files or globs, one per line")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of files converted in parallel")
+    parser.add_argument("-B", "--force", action="store_true",
+                        help="convert inputs whose outputs are up to date")
+
+
+def get_args_jobs(parser: ArgumentParser, args: Namespace, extension: str) -> list[Job]:
+    if args.output_dir is None:
+        if len(args.input) != 2 or len(args.manifest) != 0:
+            parser.error("either an input and an output file, or --output-dir is required")
+
+        return [Job(*args.input)]
+
+    sources = expand_inputs(args.input, args.manifest)
+    if len(sources) == 0:
+        parser.error("no input files")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    return get_jobs(sources, args.output_dir, extension)
+
+
+def main(parser: ArgumentParser, args: Namespace, convert: Callable[[str, str], object], extension: str) -> int:
+    jobs = get_args_jobs(parser, args, extension)
+    if args.output_dir is None:
+        convert(*jobs[0])
+        return 0
+
+    start = time.perf_counter()
+    converted, failed, skipped, busy = 0, 0, 0, 0.0
+    for job, seconds, error in run(convert, jobs, args.jobs, args.force):
+        if error is not None:
+            failed += 1
+            print(f"FAIL  {job.source}: {error}")
+            continue
+
+        if seconds is None:
+            skipped += 1
+            continue
+
+        converted += 1
+        busy += seconds
+        print(f"CONV  {os.path.basename(job.target)}  {seconds:.3f} s")
+
+    print(f"{converted} converted, {failed} failed, {skipped} up to date, "
+          f"{busy:.3f} s of conversion in {time.perf_counter() - start:.3f} s")
+    return 1 if failed != 0 else 0
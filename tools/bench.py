@@ -0,0 +1,236 @@
+import json
+import os.path
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from argparse import ArgumentParser
+from typing import Any, Callable, NamedTuple
+
+from . import cefo2yaff, yaff2cefo
+from .cefo import MAX_WIDTH, CelonesFont
+from .fontcov import get_block_coverage, get_block_index
+from .yaff import YaffFont, YaffGlyph, load_font, save
+
+
+# Benchmarks of the CeFo toolchain on synthetic fonts. Fonts are generated
+# from a seeded generator, so runs with the same arguments measure the same
+# glyphs; results are stored as JSON and compared with a baseline run.
+RESULTS_VERSION = 1
+SURROGATES = range(0xD800, 0xE000)
+
+
+class Preset(NamedTuple):
+    glyphs: int
+    min_width: int
+    max_width: int
+    sparsity: float
+
+
+# Sparsity is the chance that a code point is skipped, leaving gaps in the blocks
+PRESETS = {
+    "gidotto": Preset(124, 1, 7, 0.0),
+    "latin": Preset(1000, 4, 8, 0.25),
+    "bmp": Preset(0x10000 - 0x20 - len(SURROGATES), 4, 12, 0.0),
+}
+DEFAULT_PRESETS = ["gidotto", "latin"]
+
+
+def get_codepoints(rng: random.Random, count: int, sparsity: float) -> list[int]:
+    codepoints = list()
+    for codepoint in range(0x20, 0x10000):
+        if len(codepoints) == count:
+            break
+
+        if codepoint not in SURROGATES and rng.random() >= sparsity:
+            codepoints.append(codepoint)
+
+    return codepoints
+
+
+def get_rows(rng: random.Random, width: int, height: int = 8) -> list[str]:
+    return [format(rng.getrandbits(width), f"0{width}b").replace("0", ".").replace("1", "@")
+            for _ in range(height)]
+
+
+def generate_font(preset: Preset, seed: int = 0) -> YaffFont:
+    rng = random.Random(seed)
+    glyphs = [YaffGlyph.from_char(chr(codepoint), get_rows(rng, rng.randint(preset.min_width, preset.max_width)))
+              for codepoint in get_codepoints(rng, preset.glyphs, preset.sparsity)]
+    properties = {
+        "name": f"Synthetic {len(glyphs)}",
+        "spacing": "proportional",
+        "bounding-box": f"{preset.max_width}x8",
+    }
+    return YaffFont(properties, glyphs)
+
+
+# Benchmarks
+class Benchmark(NamedTuple):
+    name: str
+    run: Callable[[], object]
+
+
+def get_benchmarks(directory: str) -> list[Benchmark]:
+    # Each benchmark reads the font generated into the directory
+    source = os.path.join(directory, "font.yaff")
+    cefo_path = os.path.join(directory, "font.cefo")
+    target = os.path.join(directory, "target")
+    yaff2cefo.convert(source, cefo_path)
+
+    loaded = CelonesFont()
+    loaded.load(cefo_path)
+    codepoints = [ord(glyph.char) for glyph in load_font(source).glyphs]
+
+    # The Unicode block index is loaded once per process, so it is not timed
+    get_block_index()
+
+    def load_mapped() -> None:
+        font = CelonesFont()
+        font.load(cefo_path, mapped=True)
+        font.close()
+
+    def lookup() -> None:
+        for codepoint in codepoints:
+            loaded[codepoint]
+
+    return [
+        Benchmark("yaff2cefo", lambda: yaff2cefo.convert(source, target + ".cefo")),
+        Benchmark("cefo load", lambda: CelonesFont().load(cefo_path)),
+        Benchmark("cefo load mapped", load_mapped),
+        Benchmark("cefo store", lambda: loaded.store(target + ".cefo")),
+        Benchmark("cefo getitem", lookup),
+        Benchmark("cefo2yaff", lambda: cefo2yaff.convert(cefo_path, target + ".yaff")),
+        Benchmark("fontcov", lambda: list(get_block_coverage([load_font(source).glyphs]))),
+    ]
+
+
+def measure(benchmark: Benchmark, repeat: int) -> dict[str, float]:
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        benchmark.run()
+        times.append(time.perf_counter() - start)
+
+    return {"min": min(times), "median": statistics.median(times)}
+
+
+def run_preset(preset: Preset, repeat: int, seed: int = 0) -> dict[str, dict[str, float]]:
+    with tempfile.TemporaryDirectory() as directory:
+        save(generate_font(preset, seed), os.path.join(directory, "font.yaff"))
+        return {benchmark.name: measure(benchmark, repeat) for benchmark in get_benchmarks(directory)}
+
+
+# Results
+def get_environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def load_results(filename: str) -> dict[str, Any]:
+    with open(filename, encoding="utf-8") as results_file:
+        results = json.load(results_file)
+
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{filename}: unsupported results version")
+
+    return results
+
+
+def save_results(results: dict[str, Any], filename: str) -> None:
+    with open(filename, "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2)
+        results_file.write("\n")
+
+
+def get_change(baseline: dict[str, Any], preset: str, benchmark: str, seconds: float) -> float | None:
+    # Minimum times are compared, as they are the least affected by noise
+    try:
+        return seconds / baseline["results"][preset][benchmark]["min"] - 1
+    except (KeyError, ZeroDivisionError):
+        return None
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> int:
+    parser = ArgumentParser(
+        prog=prog,
+        description="Benchmark the CeFo toolchain on synthetic fonts",
+        epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
+    parser.add_argument("-p", "--preset", action="append", choices=PRESETS,
+                        help=f"font preset to benchmark, may be repeated (default: {', '.join(DEFAULT_PRESETS)})")
+    parser.add_argument("--glyphs", type=int, default=None,
+                        help="benchmark a custom font with this many glyphs instead of presets")
+    parser.add_argument("--width", default="1-8", metavar="MIN-MAX",
+                        help=f"glyph width range of the custom font, up to {MAX_WIDTH} (default: 1-8)")
+    parser.add_argument("--sparsity", type=float, default=0.0,
+                        help="chance of skipping a code point in the custom font (default: 0)")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="runs of each benchmark (default: 5)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the font generator (default: 0)")
+    parser.add_argument("-o", "--output", default=None, help="save results to this JSON file")
+    parser.add_argument("-b", "--baseline", default=None, help="compare results with this JSON file")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="slowdown against the baseline reported as a regression, in percent (default: 10)")
+    args = parser.parse_args(argv)
+
+    presets = {name: PRESETS[name] for name in args.preset or DEFAULT_PRESETS}
+    if args.glyphs is not None:
+        try:
+            min_width, max_width = map(int, args.width.split("-"))
+        except ValueError:
+            parser.error("width must be given as MIN-MAX")
+
+        if not 1 <= min_width <= max_width <= MAX_WIDTH or not 0 <= args.sparsity < 1:
+            parser.error("invalid width range or sparsity")
+
+        presets = {"custom": Preset(args.glyphs, min_width, max_width, args.sparsity)}
+
+    try:
+        baseline = load_results(args.baseline) if args.baseline is not None else None
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    results: dict[str, Any] = {"version": RESULTS_VERSION, "environment": get_environment(),
+                               "repeat": args.repeat, "seed": args.seed, "presets": dict(), "results": dict()}
+    regressions, failures = 0, 0
+    name_width = max(map(len, presets))
+    for name, preset in presets.items():
+        # Fonts that the CeFo format cannot hold are reported and skipped
+        try:
+            times = run_preset(preset, args.repeat, args.seed)
+        except ValueError as error:
+            print(f"FAIL  {name}: {error}")
+            failures += 1
+            continue
+
+        results["presets"][name] = preset._asdict()
+        results["results"][name] = times
+        width = max(map(len, results["results"][name]))
+        for benchmark, times in results["results"][name].items():
+            line = f"BENCH {name:{name_width}s} {benchmark:{width}s} {times['min']:8.4f} s min {times['median']:8.4f} s median"
+            change = get_change(baseline, name, benchmark, times["min"]) if baseline is not None else None
+            if change is not None:
+                line += f" {100 * change:+7.1f}%"
+                if 100 * change > args.threshold:
+                    line += "  REGRESSION"
+                    regressions += 1
+
+            print(line)
+
+    if args.output is not None:
+        save_results(results, args.output)
+
+    if baseline is not None:
+        print(f"{regressions} regressions over {args.threshold:g}% against {args.baseline}")
+
+    return 1 if regressions != 0 or failures != 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import os.path
+
+from argparse import ArgumentParser
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+from . import profiling
+
+if TYPE_CHECKING:
+    import monobit
+
+    from .resample import CodepageResampler
+
+
+# Family name suffixes of the code page specific variants
+CODEPAGE_FAMILIES = {
+    1250: "CE",
+    1252: "Western",
+}
+
+# monobit format names of the output file extensions
+FORMATS = {
+    ".bdf": "bdf",
+    ".cpi": "cpi",
+    ".fon": "mzfon",
+}
+
+
+# Build targets, named out/<font>[.<code page>].<format>
+class Target(NamedTuple):
+    path: str
+    source: str
+    name: str
+    codepage: int | None
+    extension: str
+
+
+def parse_target(path: str) -> Target:
+    directory, filename = os.path.split(path)
+    stem, extension = os.path.splitext(filename)
+    name, _, codepage = stem.partition(".")
+    return Target(path, os.path.join(directory, name + ".yaff"), name,
+                  int(codepage) if len(codepage) != 0 else None, extension)
+
+
+def is_outdated(target: Target) -> bool:
+    if not os.path.exists(target.path):
+        return True
+
+    return os.path.getmtime(target.path) < os.path.getmtime(target.source)
+
+
+def get_format_args(target: Target) -> dict[str, str]:
+    # Saver options are kept next to the font sources, e.g. clavis/cpi.args
+    path = os.path.join(target.name, target.extension[1:] + ".args")
+    if not os.path.exists(path):
+        return dict()
+
+    with open(path, encoding="utf-8") as args_file:
+        options = (option.lstrip("-").partition("=") for option in args_file.read().split())
+        return {key.replace("-", "_"): value for key, _, value in options}
+
+
+# Font conversion
+# monobit and the converters are imported by the workers, so that --help and
+# up-to-date builds do not load them
+def get_codepage_variant(resampler: 'CodepageResampler', codepage: int) -> 'monobit.Font':
+    variant = resampler.resample(codepage)
+    if codepage in CODEPAGE_FAMILIES:
+        variant = variant.modify(family=f"{variant.family} {CODEPAGE_FAMILIES[codepage]}")
+
+    return variant
+
+
+def load_font(target: Target, cache_dir: str, fragments_dir: str | None = None) -> 'monobit.Font':
+    # Fonts with a fragment directory, <fragments_dir>/<font>/head.yaff, are
+    # merged from the fragment cache instead of being parsed from the source
+    directory = os.path.join(fragments_dir, target.name) if fragments_dir is not None else None
+    if directory is not None and os.path.exists(os.path.join(directory, "head.yaff")):
+        from . import fragcache
+        return fragcache.load_font(directory, cache_dir)
+
+    import monobit
+    return monobit.load(target.source).get(0)
+
+
+class BuildResult(NamedTuple):
+    paths: list[str]
+    missing: dict[int, list[str]]
+
+
+def build_font(source: str, targets: list[Target], cache_dir: str, fragments_dir: str | None = None,
+               cefo_index: bool = False, profile: bool = False) -> BuildResult:
+    # All code page variants are resampled from one font in this process
+    import monobit
+
+    from .resample import CodepageResampler
+    from .yaff2cefo import BitmapFont, GlyphSource
+
+    if profile:
+        profiling.enable()
+
+    with profiling.stage("parse"):
+        font = load_font(targets[0], cache_dir, fragments_dir)
+
+    resampler = CodepageResampler(font)
+    variants: dict[int | None, 'monobit.Font'] = {None: font}
+    codepages: set[int] = set()
+
+    for target in targets:
+        with profiling.stage("resample"):
+            if target.codepage not in variants:
+                variants[target.codepage] = get_codepage_variant(resampler, target.codepage)
+                codepages.add(target.codepage)
+
+            # Code pages of multi-font formats like CPI are resampled here, not by the saver
+            variant = variants[target.codepage]
+            format_args = get_format_args(target)
+            if "codepages" in format_args:
+                numbers = [int(number) for number in format_args.pop("codepages").split(",") if len(number) != 0]
+                variant = monobit.Pack(resampler.resample(number) for number in numbers)
+                codepages.update(numbers)
+
+        with profiling.stage(f"write {os.path.basename(target.path)}"):
+            if target.extension == ".cefo":
+                BitmapFont(GlyphSource(source, variant)).write_cefo(target.path, index=cefo_index)
+            else:
+                monobit.save(variant, target.path, format=FORMATS[target.extension],
+                             overwrite=True, **format_args)
+
+    profiling.report(os.path.basename(source))
+    missing = {codepage: resampler.get_missing(codepage) for codepage in sorted(codepages)}
+    return BuildResult([target.path for target in targets],
+                       {codepage: chars for codepage, chars in missing.items() if len(chars) != 0})
+
+
+def build(paths: Iterable[str], jobs: int | None = None, force: bool = False, cache_dir: str | None = None,
+          fragments_dir: str | None = None, cefo_index: bool = False, profile: bool = False) -> Iterable[BuildResult]:
+    fonts: dict[str, list[Target]] = dict()
+    for target in map(parse_target, paths):
+        if force or is_outdated(target):
+            fonts.setdefault(target.source, list()).append(target)
+
+    if len(fonts) == 0:
+        return
+
+    # Each font is parsed once, independent fonts are built in parallel
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(build_font, source, targets,
+                                   cache_dir or os.path.join(os.path.dirname(source), ".cache"),
+                                   fragments_dir, cefo_index, profile)
+                   for source, targets in fonts.items()]
+        for future in futures:
+            yield future.result()
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = ArgumentParser(
+        prog=prog,
+        description="Utility for building binary fonts from YAFF files in a single process",
+        epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
+    parser.add_argument("output", nargs="+",
+                        help="output font files, named <font>[.<code page>].<format> next to <font>.yaff")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of fonts built in parallel")
+    parser.add_argument("-B", "--force", action="store_true",
+                        help="rebuild outputs that are up to date")
+    parser.add_argument("--cache", default=None,
+                        help="glyph fragment cache directory (default: .cache next to the outputs)")
+    parser.add_argument("--fragments", default=None, metavar="DIR",
+                        help="merge fonts from the fragments in DIR/<font>/ rather than parsing <font>.yaff")
+    parser.add_argument("--cefo-index", action="store_true",
+                        help="add the acceleration table to CeFo outputs")
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    results = build(args.output, args.jobs, args.force, args.cache, args.fragments, args.cefo_index, args.profile)
+    for paths, missing in results:
+        for path in paths:
+            print(f"CONV  {os.path.basename(path)}")
+
+        # Characters of the code pages that the font lacks
+        for codepage, chars in missing.items():
+            print(f"MISS  {os.path.basename(paths[0]).partition('.')[0]} CP{codepage:03d}: {len(chars)} missing, "
+                  + " ".join(f"U+{ord(char):04X}" for char in chars))
+
+
+if __name__ == "__main__":
+    main()
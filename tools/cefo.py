@@ -1,7 +1,21 @@
 import io
+import mmap
+import os
+import struct
 
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator, MutableMapping
+from functools import partial
+from typing import BinaryIO
+
+
+# Glyph widths are stored in 4 bits
+MAX_WIDTH = 15
+
+
+class GlyphBlockBase(ABC):
+    offset_bits: int
 
-class GlyphBlockBase:
     prefix: int
     offset: int
 
@@ -9,9 +23,25 @@ class GlyphBlockBase:
         self.prefix = -1
         self.offset = -1
 
+    @abstractmethod
+    def get_glyphs(self) -> Iterator[tuple[int, int, int]]:
+        # Yields (code point, bitmap offset, width) for each glyph in the block
+        ...
+
+    def check(self) -> None:
+        # Raises ValueError if the block does not fit its record fields
+        if not 0 <= self.offset < 1 << self.offset_bits:
+            raise ValueError(f"Block U+{self.prefix:03X}0: bitmap offset {self.offset:#x} "
+                             f"does not fit in {self.offset_bits} bits")
+
+        for codepoint, _, width in self.get_glyphs():
+            if width > MAX_WIDTH:
+                raise ValueError(f"U+{codepoint:04X}: glyphs wider than {MAX_WIDTH} pixels are not supported")
+
 
 class FullGlyphBlock(GlyphBlockBase):
     size: int = 12
+    offset_bits: int = 20
 
     widths: list[int]
 
@@ -28,12 +58,24 @@ class FullGlyphBlock(GlyphBlockBase):
         self.widths = [(widths >> (i * 4)) & 0xF for i in range(16)]
 
     def store(self) -> bytes:
+        self.check()
         offpfx = (self.offset << 12) | self.prefix
         widths = sum([self.widths[i] << (i * 4) for i in range(16)])
 
         data = offpfx.to_bytes(4, "little") + widths.to_bytes(8, "little")
         return data
 
+    @classmethod
+    def get_cost(cls, count: int) -> int:
+        # Bytes taken by the record of a block holding the given number of glyphs
+        return cls.size
+
+    def get_glyphs(self) -> Iterator[tuple[int, int, int]]:
+        offset = self.offset
+        for i, width in enumerate(self.widths):
+            yield (self.prefix << 4) | i, offset, width
+            offset += width
+
     @classmethod
     def from_bytes(cls, data: bytes) -> 'FullGlyphBlock':
         block = cls()
@@ -46,6 +88,7 @@ class FullGlyphBlock(GlyphBlockBase):
 
 class SparseGlyphBlock(GlyphBlockBase):
     size: int = 6
+    offset_bits: int = 16
 
     widths: list[tuple[int, int]]
 
@@ -64,6 +107,7 @@ class SparseGlyphBlock(GlyphBlockBase):
         self.widths = [(byte >> 4, byte & 0xF) for byte in sgly_data]
 
     def store(self, sgly_offset: int) -> tuple[bytes, bytes]:
+        self.check()
         lenpfx = (len(self.widths) << 12) | self.prefix
         offset = self.offset
 
@@ -71,6 +115,17 @@ class SparseGlyphBlock(GlyphBlockBase):
         sgly_data = bytes(((i << 4) | w) for i, w in self.widths)
         return data, sgly_data
 
+    @classmethod
+    def get_cost(cls, count: int) -> int:
+        # Record and one sgly byte per glyph
+        return cls.size + count
+
+    def get_glyphs(self) -> Iterator[tuple[int, int, int]]:
+        offset = self.offset
+        for i, width in self.widths:
+            yield (self.prefix << 4) | i, offset, width
+            offset += width
+
     @classmethod
     def from_bytes(cls, data: bytes, sgly: bytes) -> 'SparseGlyphBlock':
         block = cls()
@@ -81,117 +136,540 @@ class SparseGlyphBlock(GlyphBlockBase):
         return "<SparseGlyphBlock {} at {:05X}>".format(", ".join("{:03X}{:X}".format(self.prefix, i) for i, _ in self.widths), self.offset)
 
 
+GlyphBlock = FullGlyphBlock | SparseGlyphBlock
+
+
+class AccelerationTable:
+    # Optional 'gidx' chunk: a directory of 8-byte entries sorted by prefix
+    # (prefix, bit mask of present glyphs, index of the first glyph entry),
+    # followed by 4-byte glyph entries (absolute bitmap offset << 4 | width).
+    # It roughly doubles a small font, so encoders only add it on request.
+    entry_size: int = 8
+    glyph_entry_size: int = 4
+
+    data: bytes | memoryview
+    count: int
+
+    def __init__(self, data: bytes | memoryview = bytes(4)) -> None:
+        self.data = data
+        self.count = int.from_bytes(data[0:4], "little")
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[GlyphBlock]) -> 'AccelerationTable':
+        directory, entries = bytearray(), bytearray()
+        for block in sorted(blocks, key=lambda block: block.prefix):
+            mask = 0
+            first = len(entries) // cls.glyph_entry_size
+            for codepoint, offset, width in block.get_glyphs():
+                mask |= 1 << (codepoint & 0xF)
+                entries.extend(struct.pack("<I", (offset << 4) | width))
+
+            directory.extend(struct.pack("<HHI", block.prefix, mask, first))
+
+        count = len(directory) // cls.entry_size
+        return cls(count.to_bytes(4, "little") + directory + entries)
+
+    @classmethod
+    def get_cost(cls, count: int) -> int:
+        # Bytes taken by a block holding the given number of glyphs
+        return cls.entry_size + count * cls.glyph_entry_size
+
+    def store(self) -> bytes:
+        return bytes(self.data)
+
+    def _find(self, prefix: int) -> int | None:
+        # Binary search over the directory
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_prefix, = struct.unpack_from("<H", self.data, 4 + middle * self.entry_size)
+            if entry_prefix < prefix:
+                low = middle + 1
+            elif entry_prefix > prefix:
+                high = middle
+            else:
+                return 4 + middle * self.entry_size
+
+        return None
+
+    def _get_entry(self, first: int) -> tuple[int, int]:
+        position = 4 + self.count * self.entry_size + first * self.glyph_entry_size
+        entry, = struct.unpack_from("<I", self.data, position)
+        return entry >> 4, entry & 0xF
+
+    def get_block_glyphs(self, prefix: int) -> list[tuple[int, int, int]]:
+        # Same as GlyphBlockBase.get_glyphs(), without decoding the block
+        position = self._find(prefix)
+        if position is None:
+            return []
+
+        _, mask, first = struct.unpack_from("<HHI", self.data, position)
+        glyphs = list()
+        for i in range(16):
+            if mask & (1 << i):
+                offset, width = self._get_entry(first)
+                glyphs.append(((prefix << 4) | i, offset, width))
+                first += 1
+
+        return glyphs
+
+    def get_span(self, codepoint: int) -> tuple[int, int] | None:
+        position = self._find(codepoint >> 4)
+        if position is None:
+            return None
+
+        _, mask, first = struct.unpack_from("<HHI", self.data, position)
+        bit = 1 << (codepoint & 0xF)
+        if not mask & bit:
+            return None
+
+        offset, width = self._get_entry(first + (mask & (bit - 1)).bit_count())
+        return offset, offset + width
+
+
+# PackBits run-length coding of the optional 'bmpz' compressed bitmap chunk,
+# stored after the 4-byte size of the decoded bitmap
+def rle_encode(data: bytes) -> bytes:
+    result = bytearray()
+    i, count = 0, len(data)
+    while i < count:
+        run = 1
+        while i + run < count and run < 128 and data[i + run] == data[i]:
+            run += 1
+
+        if run >= 2:
+            result.append(257 - run)
+            result.append(data[i])
+            i += run
+            continue
+
+        # Literal packet, up to the start of the next run of three
+        start = i
+        while i < count and i - start < 128:
+            if i + 2 < count and data[i] == data[i + 1] == data[i + 2]:
+                break
+            i += 1
+
+        result.append(i - start - 1)
+        result.extend(data[start:i])
+
+    return bytes(result)
+
+
+def rle_decode(data: bytes, size: int) -> bytes:
+    result = bytearray()
+    i = 0
+    while i < len(data) and len(result) < size:
+        header = data[i]
+        if header < 128:
+            result.extend(data[i + 1:i + header + 2])
+            i += header + 2
+        elif header > 128:
+            result.extend(bytes((data[i + 1],)) * (257 - header))
+            i += 2
+        else:
+            i += 1
+
+    if len(result) != size:
+        raise ValueError("Compressed bitmap is corrupted")
+
+    return bytes(result)
+
+
+def compress_bitmap(bitmap: bytes) -> bytes:
+    return len(bitmap).to_bytes(4, "little") + rle_encode(bitmap)
+
+
+def decompress_bitmap(data: bytes) -> bytes:
+    return rle_decode(data[4:], int.from_bytes(data[0:4], "little"))
+
+
+# RIFF chunks used by the font, in the order written by CelonesFont.store()
+CHUNKS = (b"fblk", b"sblk", b"sgly", b"bmp ", b"bmpz", b"gidx")
+
+
+def iter_chunks(stream: BinaryIO) -> Iterator[tuple[bytes, int, int]]:
+    # Yields (FourCC, data position, size) of each chunk, reading only the headers
+    stream.seek(0)
+    if stream.read(4) != b"RIFF":
+        raise ValueError("File is not RIFF")
+
+    size = int.from_bytes(stream.read(4), "little")
+    if stream.read(4) != b"CeFo":
+        raise ValueError("File is not a Celones Font")
+
+    position, end = 12, 8 + size
+    while position + 8 <= end:
+        stream.seek(position)
+        header = stream.read(8)
+        if len(header) < 8:
+            break
+
+        chunk_size = int.from_bytes(header[4:8], "little")
+        yield header[0:4], position + 8, chunk_size
+        position += 8 + chunk_size
+
+
+class GlyphBlockMap(MutableMapping[int, GlyphBlock]):
+    _blocks: dict[int, GlyphBlock | None]
+    _loaders: dict[int, Callable[[], GlyphBlock]]
+    _on_change: Callable[[], None]
+
+    def __init__(self, on_change: Callable[[], None], blocks: Iterable[tuple[int, GlyphBlock]] = ()) -> None:
+        self._blocks = dict(blocks)
+        self._loaders = dict()
+        self._on_change = on_change
+
+    def defer(self, prefix: int, loader: Callable[[], GlyphBlock]) -> None:
+        # The block gets decoded on first access
+        self._blocks[prefix] = None
+        self._loaders[prefix] = loader
+        self._on_change()
+
+    def __getitem__(self, prefix: int) -> GlyphBlock:
+        block = self._blocks[prefix]
+        if block is None:
+            block = self._loaders.pop(prefix)()
+            self._blocks[prefix] = block
+
+        return block
+
+    def __setitem__(self, prefix: int, block: GlyphBlock) -> None:
+        self._loaders.pop(prefix, None)
+        self._blocks[prefix] = block
+        self._on_change()
+
+    def __delitem__(self, prefix: int) -> None:
+        self._loaders.pop(prefix, None)
+        del self._blocks[prefix]
+        self._on_change()
+
+    def __contains__(self, prefix: object) -> bool:
+        return prefix in self._blocks
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._blocks)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+
 class CelonesFont:
-    bitmap: bytes
-    blocks: dict[int, FullGlyphBlock | SparseGlyphBlock]
+    bitmap: bytes | memoryview
+    _blocks: GlyphBlockMap
+    _index: dict[int, tuple[int, int]]
+    _indexed: set[int]
+    _mapping: mmap.mmap | None
+    _acceleration: AccelerationTable | None
 
     def __init__(self) -> None:
         self.bitmap = b""
         self.blocks = dict()
-
-    def load(self, filename: str) -> None:
+        self._mapping = None
+
+    @property
+    def blocks(self) -> GlyphBlockMap:
+        return self._blocks
+
+    @blocks.setter
+    def blocks(self, blocks: dict[int, GlyphBlock]) -> None:
+        self._blocks = GlyphBlockMap(self.invalidate, blocks.items())
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        # Must be called after modifying widths or offsets of a block in place
+        self._acceleration = None
+        self._index = dict()
+        self._indexed = set()
+
+    def _index_block(self, prefix: int) -> None:
+        self._indexed.add(prefix)
+        glyphs: Iterable[tuple[int, int, int]]
+        if self._acceleration is not None:
+            glyphs = self._acceleration.get_block_glyphs(prefix)
+        else:
+            block = self.blocks.get(prefix)
+            glyphs = block.get_glyphs() if block is not None else ()
+
+        self._index.update((codepoint, (offset, offset + width))
+                           for codepoint, offset, width in glyphs)
+
+    def get_index(self) -> dict[int, tuple[int, int]]:
+        for prefix in self.blocks:
+            if prefix not in self._indexed:
+                self._index_block(prefix)
+
+        return self._index
+
+    def get_span(self, codepoint: int) -> tuple[int, int] | None:
+        span = self._index.get(codepoint)
+        if span is None and (codepoint >> 4) not in self._indexed:
+            self._index_block(codepoint >> 4)
+            span = self._index.get(codepoint)
+
+        return span
+
+    def load(self, filename: str, mapped: bool = False) -> None:
+        self.close()
+
+        # Read or map only the applicable RIFF chunks, seeking over the rest
+        chunks: dict[bytes, bytes | memoryview] = dict()
         with io.open(filename, mode="rb") as cefo:
-            # Verify the basic header structure
-            fourcc = cefo.read(4)
-            if fourcc != b"RIFF":
-                raise ValueError("File is not RIFF")
-
-            size = int.from_bytes(cefo.read(4), "little")
-            fourcc = cefo.read(4)
-            if fourcc != b"CeFo":
-                raise ValueError("File is not a Celones Font")
-
-            # Load applicable RIFF chunks
-            fblk, sblk, sgly, bmp = b"", b"", b"", b""
-            while size > 0:
-                fourcc = cefo.read(4)
-                chunk_size = int.from_bytes(cefo.read(4), "little")
-                data = cefo.read(chunk_size)
-
-                if fourcc == b"fblk":
-                    fblk = data
-                elif fourcc == b"sblk":
-                    sblk = data
-                elif fourcc == b"sgly":
-                    sgly = data
-                elif fourcc == b"bmp ":
-                    bmp = data
-
-                size -= 8 + chunk_size
-
-            # Populate full glyph block list
-            count = round(len(fblk) / FullGlyphBlock.size)
-            for i in range(count):
-                block = FullGlyphBlock.from_bytes(fblk[i * FullGlyphBlock.size:])
-                self.blocks[block.prefix] = block
-
-            # Populate sparse glyph block list
-            count = round(len(sblk) / SparseGlyphBlock.size)
-            for i in range(count):
-                block = SparseGlyphBlock.from_bytes(sblk[i * SparseGlyphBlock.size:], sgly)
-                self.blocks[block.prefix] = block
-
-            # Set the glyph bitmap
-            self.bitmap = bmp
-
-    def store(self, filename: str) -> None:
-        with io.open(filename, mode="wb") as cefo:
-            # Prepare full blocks
-            fblk = bytearray()
-            for _, block in self.blocks.items():
-                if isinstance(block, FullGlyphBlock):
-                    fblk.extend(block.store())
-
-            # Prepare sparse blocks
-            sblk = bytearray()
-            sgly = bytearray()
-            sparse_glyph_offset = 0
-            for _, block in self.blocks.items():
-                if isinstance(block, SparseGlyphBlock):
-                    block_data, sgly_data = block.store(sparse_glyph_offset)
-                    sblk.extend(block_data)
-                    sgly.extend(sgly_data)
-                    sparse_glyph_offset += len(sgly_data)
-
-            # Prepare chunks
-            if len(self.bitmap) % 2 != 0:
-                self.bitmap += b"\0"
-
-            chunks = [
-                (b"fblk", fblk),
-                (b"sblk", sblk),
-                (b"sgly", sgly),
-                (b"bmp ", self.bitmap)
-            ]
-
-            # Write the RIFF file
-            cefo.write(b"RIFF")
-            cefo.write((sum(len(data) + 8 for _, data in chunks) + 4).to_bytes(4, "little"))
-            cefo.write(b"CeFo")
-
-            for fourcc, data in chunks:
-                cefo.write(fourcc)
-                cefo.write(len(data).to_bytes(4, "little"))
-                cefo.write(data)
-
-    def __getitem__(self, index: int) -> bytes:
-        prefix = index >> 4
-        if prefix not in self.blocks:
+            if mapped:
+                self._mapping = mmap.mmap(cefo.fileno(), 0, access=mmap.ACCESS_READ)
+                view = memoryview(self._mapping)
+
+            for fourcc, position, chunk_size in iter_chunks(cefo):
+                if fourcc not in CHUNKS:
+                    continue
+
+                if mapped:
+                    chunks[fourcc] = view[position:position + chunk_size]
+                else:
+                    cefo.seek(position)
+                    chunks[fourcc] = cefo.read(chunk_size)
+
+        fblk = chunks.get(b"fblk", b"")
+        sblk = chunks.get(b"sblk", b"")
+        sgly = chunks.get(b"sgly", b"")
+
+        # Populate full glyph block list
+        for position in range(0, len(fblk) - FullGlyphBlock.size + 1, FullGlyphBlock.size):
+            record = fblk[position:position + FullGlyphBlock.size]
+            prefix = int.from_bytes(record[0:2], "little") & 0xFFF
+            if mapped:
+                self.blocks.defer(prefix, partial(FullGlyphBlock.from_bytes, record))
+            else:
+                self.blocks[prefix] = FullGlyphBlock.from_bytes(record)
+
+        # Populate sparse glyph block list
+        for position in range(0, len(sblk) - SparseGlyphBlock.size + 1, SparseGlyphBlock.size):
+            record = sblk[position:position + SparseGlyphBlock.size]
+            prefix = int.from_bytes(record[0:2], "little") & 0xFFF
+            if mapped:
+                self.blocks.defer(prefix, partial(SparseGlyphBlock.from_bytes, record, sgly))
+            else:
+                self.blocks[prefix] = SparseGlyphBlock.from_bytes(record, sgly)
+
+        # Set the glyph bitmap
+        if b"bmpz" in chunks:
+            self.bitmap = decompress_bitmap(chunks[b"bmpz"])
+        else:
+            self.bitmap = chunks.get(b"bmp ", b"")
+
+        # Use the acceleration table when present, it is dropped on block changes
+        if b"gidx" in chunks:
+            self._acceleration = AccelerationTable(chunks[b"gidx"])
+
+    def close(self) -> None:
+        # Releases the file mapping; glyph slices still in use keep it
+        # open until they are released, and it is then closed with them
+        self.bitmap = b""
+        self.blocks = dict()
+        if self._mapping is not None:
+            mapping, self._mapping = self._mapping, None
+            try:
+                mapping.close()
+            except BufferError:
+                pass
+
+    def store(self, filename: str, compress: bool = False, index: bool = False) -> None:
+        # All chunks are prepared first, then written under a temporary name and
+        # renamed, as by CelonesFontWriter. Write errors leave no partial file,
+        # and a mapped font can be stored over the file it is mapped from.
+        # Prepare full blocks
+        # Records are sorted by prefix, so that readers can binary search them
+        blocks = sorted(self.blocks.items(), key=lambda item: item[0])
+
+        fblk = bytearray()
+        for _, block in blocks:
+            if isinstance(block, FullGlyphBlock):
+                fblk.extend(block.store())
+
+        # Prepare sparse blocks
+        sblk = bytearray()
+        sgly = bytearray()
+        sparse_glyph_offset = 0
+        for _, block in blocks:
+            if isinstance(block, SparseGlyphBlock):
+                block_data, sgly_data = block.store(sparse_glyph_offset)
+                sblk.extend(block_data)
+                sgly.extend(sgly_data)
+                sparse_glyph_offset += len(sgly_data)
+
+        # Prepare chunks
+        # A compressed bitmap that is not smaller is stored plain
+        bitmap = self.bitmap
+        if compress:
+            compressed = compress_bitmap(self.bitmap)
+            compress = len(compressed) < len(bitmap)
+            bitmap = compressed if compress else bitmap
+
+        if len(bitmap) % 2 != 0:
+            bitmap = bytes(bitmap) + b"\0"
+
+        chunks = [
+            (b"fblk", fblk),
+            (b"sblk", sblk),
+            (b"sgly", sgly),
+            (b"bmpz" if compress else b"bmp ", bitmap),
+        ]
+        if index:
+            chunks.append((b"gidx", AccelerationTable.from_blocks(self.blocks.values()).store()))
+
+        # Write the RIFF file
+        temporary = filename + ".tmp"
+        try:
+            with io.open(temporary, mode="wb") as cefo:
+                cefo.write(b"RIFF")
+                cefo.write((sum(len(data) + 8 for _, data in chunks) + 4).to_bytes(4, "little"))
+                cefo.write(b"CeFo")
+
+                for fourcc, data in chunks:
+                    cefo.write(fourcc)
+                    cefo.write(len(data).to_bytes(4, "little"))
+                    cefo.write(data)
+
+            os.replace(temporary, filename)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def __getitem__(self, index: int) -> bytes | memoryview:
+        span = self.get_span(index)
+        if span is None:
             return b""
 
-        block = self.blocks[prefix]
-
-        if isinstance(block, FullGlyphBlock):
-            start = block.offset + sum(block.widths[:index & 0xF])
-            stop = start + block.widths[index & 0xF]
-            return self.bitmap[start:stop]
-
-        # Sparse block
-        start = block.offset
-        for i, width in block.widths:
-            if i == index & 0xF:
-                return self.bitmap[start:start + width]
-
-            start += width
-
-        return b""
+        return self.bitmap[span[0]:span[1]]
+
+    def lookup_many(self, codepoints: Iterable[int] | str) -> list[bytes | memoryview]:
+        if isinstance(codepoints, str):
+            codepoints = map(ord, codepoints)
+
+        get_span, bitmap = self.get_span, self.bitmap
+        spans = (get_span(codepoint) or (0, 0) for codepoint in codepoints)
+        return [bitmap[start:stop] for start, stop in spans]
+
+
+class CelonesFontWriter:
+    # Streams the bitmap straight into the file, followed by the block chunks.
+    # Only the blocks are kept in memory, and RIFF sizes are patched on close.
+    # The file is written under a temporary name and renamed when complete,
+    # so a failed conversion never leaves a truncated font behind.
+    # With compression, each block's bitmap is run-length coded on its own,
+    # since PackBits packets can be concatenated. A compressed bitmap that
+    # turns out no smaller is read back and stored plain on close.
+    filename: str
+    bitmap_size: int
+    stored_size: int
+
+    _stream: BinaryIO
+    _blocks: list[GlyphBlock]
+    _compress: bool
+    _index: bool
+
+    def __init__(self, filename: str, compress: bool = False, index: bool = False) -> None:
+        self.filename = filename
+        self._stream = io.open(self.get_temporary_name(), mode="w+b")
+        self._blocks = list()
+        self._compress = compress
+        self._index = index
+        self.bitmap_size = 0
+        self.stored_size = 0
+
+        self._stream.write(b"RIFF" + bytes(4) + b"CeFo")
+        self._stream.write((b"bmpz" if compress else b"bmp ") + bytes(4))
+        if compress:
+            self._stream.write(bytes(4))
+            self.stored_size += 4
+
+    def get_temporary_name(self) -> str:
+        return self.filename + ".tmp"
+
+    def write_block(self, block: GlyphBlock, bitmap: bytes) -> None:
+        if len(bitmap) != sum(width for _, _, width in block.get_glyphs()):
+            raise ValueError("Bitmap size does not match block widths")
+
+        block.offset = self.bitmap_size
+        block.check()
+        self._blocks.append(block)
+
+        data = rle_encode(bitmap) if self._compress else bitmap
+        self._stream.write(data)
+        self.bitmap_size += len(bitmap)
+        self.stored_size += len(data)
+
+    @property
+    def compressed(self) -> bool:
+        return self._compress
+
+    def _store_plain(self) -> None:
+        # Replaces the compressed bitmap chunk with the decoded bitmap, which is no larger
+        # The decoded size is only patched in later, so it is not read back
+        self._stream.seek(24)
+        bitmap = rle_decode(self._stream.read(self.stored_size - 4), self.bitmap_size)
+        self._stream.seek(12)
+        self._stream.write(b"bmp " + bytes(4) + bitmap)
+        self._stream.truncate()
+        self._compress = False
+        self.stored_size = len(bitmap)
+
+    def close(self) -> None:
+        if self._stream.closed:
+            return
+
+        if self._compress and self.stored_size >= self.bitmap_size:
+            self._store_plain()
+
+        padding = self.stored_size % 2
+        self._stream.write(bytes(padding))
+
+        # Block records are sorted by prefix, so that readers can binary search them
+        fblk, sblk, sgly = bytearray(), bytearray(), bytearray()
+        for block in sorted(self._blocks, key=lambda block: block.prefix):
+            if isinstance(block, FullGlyphBlock):
+                fblk.extend(block.store())
+            else:
+                block_data, sgly_data = block.store(len(sgly))
+                sblk.extend(block_data)
+                sgly.extend(sgly_data)
+
+        chunks = [(b"fblk", fblk), (b"sblk", sblk), (b"sgly", sgly)]
+        if self._index:
+            chunks.append((b"gidx", AccelerationTable.from_blocks(self._blocks).store()))
+
+        for fourcc, data in chunks:
+            self._stream.write(fourcc)
+            self._stream.write(len(data).to_bytes(4, "little"))
+            self._stream.write(data)
+
+        size = self._stream.tell()
+        self._stream.seek(16)
+        self._stream.write((self.stored_size + padding).to_bytes(4, "little"))
+        if self._compress:
+            self._stream.write(self.bitmap_size.to_bytes(4, "little"))
+        self._stream.seek(4)
+        self._stream.write((size - 8).to_bytes(4, "little"))
+        self._stream.close()
+        os.replace(self.get_temporary_name(), self.filename)
+
+    def abort(self) -> None:
+        # Discards the partially written file
+        self._stream.close()
+        if os.path.exists(self.get_temporary_name()):
+            os.remove(self.get_temporary_name())
+
+    def __enter__(self) -> 'CelonesFontWriter':
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        if exc_type is not None:
+            self.abort()
+            return
+
+        try:
+            self.close()
+        except BaseException:
+            self.abort()
+            raise
@@ -1,52 +1,165 @@
+import io
+import os
+import sys
+
 from argparse import ArgumentParser
-from cefo import CelonesFont, FullGlyphBlock, GlyphBlockBase, SparseGlyphBlock
-from monobit import Glyph, Font, storage
+from functools import partial
 from os.path import basename, splitext
-from typing import Generator
+from typing import Iterator, TextIO
+
+from . import batch, profiling
+from .cefo import CelonesFont
+from .packing import COLUMN_HEIGHT, unpack_columns
+from .yaff import YaffGlyph, write_glyph, write_properties
+
+
+RASTER_INK = str.maketrans("01", ".@")
+FORMATS = ("yaff", "bdf")
+
+
+# Glyphs are walked block by block with running offsets, and each block is
+# unpacked and written before the next one, so memory use does not grow
+# with the font. The bitmap is memory-mapped rather than read.
+def iter_glyphs(cefo: CelonesFont) -> Iterator[tuple[int, int, int]]:
+    for prefix in sorted(cefo.blocks):
+        yield from cefo.blocks[prefix].get_glyphs()
+
+
+def iter_rasters(cefo: CelonesFont) -> Iterator[tuple[int, tuple[str, ...]]]:
+    for prefix in sorted(cefo.blocks):
+        glyphs = list(cefo.blocks[prefix].get_glyphs())
+        rasters = unpack_columns(cefo.bitmap[offset:offset + width] for _, offset, width in glyphs)
+        yield from zip((codepoint for codepoint, _, _ in glyphs), rasters)
+
+
+def get_glyph(codepoint: int, raster: tuple) -> YaffGlyph:
+    return YaffGlyph.from_char(chr(codepoint), (row.translate(RASTER_INK) for row in raster))
+
+
+def get_metrics(cefo: CelonesFont) -> tuple[int, set[int]]:
+    # Glyph count and widths, from the block tables alone
+    count, widths = 0, set()
+    for _, _, width in iter_glyphs(cefo):
+        count += 1
+        widths.add(width)
+
+    return count, widths
+
+
+def get_properties(name: str, cefo: CelonesFont) -> dict[str, str]:
+    count, widths = get_metrics(cefo)
+    height = COLUMN_HEIGHT if count != 0 else 0
+    return {
+        "name": name,
+        "spacing": "proportional" if len(widths) > 1 else "character-cell",
+        "bounding-box": f"{max(widths, default=0)}x{height}",
+    }
+
+
+# Exporters
+def write_yaff(cefo: CelonesFont, name: str, stream: TextIO) -> None:
+    write_properties(get_properties(name, cefo), stream)
+    for codepoint, raster in iter_rasters(cefo):
+        write_glyph(get_glyph(codepoint, raster), stream)
+
+
+def get_bdf_row(row: str) -> str:
+    # Rows are padded to whole bytes, leftmost pixel in the most significant bit
+    size = (len(row) + 7) // 8
+    return format(int(row, 2) << (size * 8 - len(row)), f"0{size * 2}X")
+
+
+def get_xlfd_name(name: str, cefo: CelonesFont) -> str:
+    # Fields are separated by hyphens, so they cannot hold any
+    count, widths = get_metrics(cefo)
+    spacing = "p" if len(widths) > 1 else "c"
+    average = sum(width for _, _, width in iter_glyphs(cefo)) * 10 // max(count, 1)
+    family = name.replace("-", " ").lower()
+    return f"-misc-{family}-medium-r-normal--{COLUMN_HEIGHT}-{COLUMN_HEIGHT * 10}-75-75-{spacing}-{average}-iso10646-1"
+
+
+def write_bdf(cefo: CelonesFont, name: str, stream: TextIO) -> None:
+    count, widths = get_metrics(cefo)
+    width = max(widths, default=0)
+    stream.write("STARTFONT 2.1\n"
+                 f"FONT {get_xlfd_name(name, cefo)}\n"
+                 f"SIZE {COLUMN_HEIGHT} 75 75\n"
+                 f"FONTBOUNDINGBOX {width} {COLUMN_HEIGHT} 0 0\n"
+                 "STARTPROPERTIES 5\n"
+                 f"FAMILY_NAME \"{name}\"\n"
+                 "CHARSET_REGISTRY \"ISO10646\"\n"
+                 "CHARSET_ENCODING \"1\"\n"
+                 f"FONT_ASCENT {COLUMN_HEIGHT}\n"
+                 "FONT_DESCENT 0\n"
+                 "ENDPROPERTIES\n"
+                 f"CHARS {count}\n")
+
+    for codepoint, raster in iter_rasters(cefo):
+        glyph_width = len(raster[0]) if len(raster) != 0 else 0
+        height = COLUMN_HEIGHT if glyph_width != 0 else 0
+        stream.write(f"STARTCHAR u{codepoint:04X}\n"
+                     f"ENCODING {codepoint}\n"
+                     f"SWIDTH {glyph_width * 1000 // COLUMN_HEIGHT} 0\n"
+                     f"DWIDTH {glyph_width} 0\n"
+                     f"BBX {glyph_width} {height} 0 0\n"
+                     "BITMAP\n")
+        stream.writelines(get_bdf_row(row) + "\n" for row in raster[:height])
+        stream.write("ENDCHAR\n")
 
+    stream.write("ENDFONT\n")
 
-def get_glyph_data(block: GlyphBlockBase) -> Generator[tuple[int, bytes], None, None]:
-    if isinstance(block, FullGlyphBlock):
-        for i in range(16):
-            width = block.widths[i]
-            offset = block.offset + sum(block.widths[:i])
-            yield (block.prefix << 4) + i, cefo.bitmap[offset:offset + width]
 
-    elif isinstance(block, SparseGlyphBlock):
-        for i, width in block.widths:
-            offset = block.offset + sum(w for _, w in block.widths if _ < i)
-            yield (block.prefix << 4) + i, cefo.bitmap[offset:offset + width]
+WRITERS = {
+    ".yaff": write_yaff,
+    ".bdf": write_bdf,
+}
 
 
-def get_scanline(data: bytes, line: int) -> str:
-    mask = 1 << line
-    return "".join("1" if column & mask else "0" for column in data)
+def convert(input: str, output: str, profile: bool = False) -> None:
+    extension = splitext(output)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unsupported output format: {extension}")
 
+    if profile:
+        profiling.enable()
 
-def get_raster(data: bytes) -> tuple:
-    return tuple(get_scanline(data, line) for line in range(8))
+    with profiling.stage("parse"):
+        cefo = CelonesFont()
+        cefo.load(input, mapped=True)
 
+    # Glyphs are unpacked while they are written, under a temporary name
+    # renamed when complete, so a failed export leaves no partial file behind
+    temporary = output + ".tmp"
+    try:
+        with profiling.stage("write"), io.open(temporary, mode="w", encoding="utf-8") as stream:
+            WRITERS[extension](cefo, splitext(basename(input))[0], stream)
 
-def get_glyph(codepoint: int, raster: tuple) -> Glyph:
-    return Glyph(pixels=raster, char=chr(codepoint))
+        os.replace(temporary, output)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    finally:
+        cefo.close()
 
+    profiling.report(output)
 
-parser = ArgumentParser(
-    description="Utility for converting Celones Font files to YAFF format",
-    epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
-parser.add_argument("input", help="input Celones Font file")
-parser.add_argument("output", help="output YAFF file")
-args = parser.parse_args()
 
-cefo = CelonesFont()
-cefo.load(args.input)
+def main(argv: list[str] | None = None, prog: str | None = None) -> int:
+    parser = ArgumentParser(
+        prog=prog,
+        description="Utility for converting Celones Font files to YAFF or BDF format",
+        epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
+    parser.add_argument("input", nargs="+",
+                        help="input Celones Font file and output YAFF or BDF file, or input files and globs with --output-dir")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="yaff",
+                        help="output format with --output-dir (otherwise taken from the output file extension)")
+    batch.add_arguments(parser)
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
 
-glyphs = list()
+    return batch.main(parser, args, partial(convert, profile=args.profile), "." + args.format)
 
-for _, block in cefo.blocks.items():
-    for codepoint, data in get_glyph_data(block):
-        glyphs.append(get_glyph(codepoint, get_raster(data)))
 
-yaff = Font(tuple(glyphs))
-yaff.name = splitext(basename(args.input))[0]
-storage.save(yaff, args.output, format="yaff", overwrite=True)
+if __name__ == "__main__":
+    sys.exit(main())
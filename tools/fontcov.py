@@ -1,12 +1,21 @@
+import encodings
 import importlib
-import monobit
-import sys
+import json
+import os
+import pkgutil
 import unicodedata
 
 from argparse import ArgumentParser
-from collections import Counter
-from typing import Iterable, NamedTuple
-from unidata_blocks import get_block_by_code_point
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from functools import cache
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+from . import profiling
+from .yaff import load_font
+
+if TYPE_CHECKING:
+    import monobit
 
 
 # IBM PC memory-mapped video graphics
@@ -59,33 +68,98 @@ def is_printable(cp) -> bool:
     return not unicodedata.category(chr(cp)).startswith("C")
 
 
-def codepoints_from_glyphs(glyphs: Iterable[monobit.Glyph]) -> Iterable[int]:
+def codepoints_from_glyphs(glyphs: Iterable['monobit.Glyph']) -> Iterable[int]:
     return sorted(set(filter(is_printable, (ord(char)
                                             for glyph in glyphs
                                             for char in glyph.chars))))
 
 
+# Unicode block interval index
+class BlockIndex(NamedTuple):
+    starts: list[int]
+    ends: list[int]
+    names: list[str]
+    totals: list[int]
+
+
+def get_block_index_path() -> str:
+    import unidata_blocks
+    cache_dir = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    version = f"{unicodedata.unidata_version}-{unidata_blocks.unicode_version}"
+    return os.path.join(cache_dir, "raster-fonts", f"blocks-{version}.json")
+
+
+def build_block_index() -> BlockIndex:
+    import unidata_blocks
+    blocks = sorted(unidata_blocks.get_blocks(), key=lambda block: block.code_start)
+    return BlockIndex([block.code_start for block in blocks],
+                      [block.code_end for block in blocks],
+                      [block.name for block in blocks],
+                      [sum(map(is_printable, range(block.code_start, block.code_end + 1)))
+                       for block in blocks])
+
+
+@cache
+def get_block_index() -> BlockIndex:
+    path = get_block_index_path()
+    try:
+        with open(path, encoding="utf-8") as cache_file:
+            return BlockIndex(*json.load(cache_file))
+    except (OSError, ValueError, TypeError):
+        pass
+
+    index = build_block_index()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as cache_file:
+            json.dump(index, cache_file)
+    except OSError:
+        pass
+
+    return index
+
+
+def get_block_name(codepoint: int) -> str | None:
+    index = get_block_index()
+    i = bisect_right(index.starts, codepoint) - 1
+    if i < 0 or codepoint > index.ends[i]:
+        return None
+
+    return index.names[i]
+
+
 def get_block_counts(codepoints: Iterable[int]) -> Counter[str]:
-    return Counter(cp.name
-                   for cp in map(get_block_by_code_point, filter(is_printable, codepoints))
-                   if cp is not None)
+    return Counter(name
+                   for name in map(get_block_name, filter(is_printable, codepoints))
+                   if name is not None)
 
 
 def get_codepoint_table(codepage: int) -> str:
-    encoding = importlib.import_module(f"encodings.cp{codepage}")
+    encoding = importlib.import_module(f"encodings.cp{codepage:03d}")
     return patch_ibm_codepage(encoding.decoding_table) if codepage in IBMGRAPH_CODEPAGES else encoding.decoding_table
 
 
-def get_codepage_count(glyphs: Iterable[monobit.Glyph], codepage: int) -> int:
-    table = get_codepoint_table(codepage)
-    count = sum(chr(cp) in table for cp in codepoints_from_glyphs(glyphs))
-    return count
+def get_all_codepages() -> list[int]:
+    # Single-byte code pages, i.e. the ones with a decoding table
+    codepages = list()
+    for module in pkgutil.iter_modules(encodings.__path__):
+        number = module.name.removeprefix("cp")
+        if number != module.name and number.isdigit():
+            encoding = importlib.import_module(f"encodings.{module.name}")
+            if hasattr(encoding, "decoding_table"):
+                codepages.append(int(number))
+
+    return sorted(codepages)
 
 
-def get_codepage_total(codepage: int) -> int:
-    table = get_codepoint_table(codepage)
-    total = len(set(filter(is_printable, (ord(char) for char in table))))
-    return total
+def get_codepage_index(codepages: Iterable[int]) -> dict[int, set[int]]:
+    # Maps each printable code point to the code pages containing it
+    index: dict[int, set[int]] = defaultdict(set)
+    for codepage in codepages:
+        for codepoint in filter(is_printable, map(ord, get_codepoint_table(codepage))):
+            index[codepoint].add(codepage)
+
+    return index
 
 
 # Coverage statistics
@@ -95,12 +169,12 @@ class CoverageReport(NamedTuple):
     total: int
 
 
-def get_block_coverage(glyph_sets: Iterable[Iterable[monobit.Glyph]]) -> Iterable[CoverageReport]:
-    unicode_blocks = get_block_counts(range(sys.maxunicode + 1))
+def get_block_coverage(glyph_sets: Iterable[Iterable['monobit.Glyph']]) -> Iterable[CoverageReport]:
+    index = get_block_index()
     glyph_set_counts = list(
         map(get_block_counts, map(codepoints_from_glyphs, glyph_sets)))
 
-    for block, count in unicode_blocks.items():
+    for block, count in zip(index.names, index.totals):
         counts = list(glyph_set_count[block]
                       if block in glyph_set_count else 0
                       for glyph_set_count in glyph_set_counts)
@@ -108,61 +182,87 @@ def get_block_coverage(glyph_sets: Iterable[Iterable[monobit.Glyph]]) -> Iterabl
             yield CoverageReport(block, counts, count)
 
 
-def get_codepage_coverage(glyph_sets: Iterable[Iterable[monobit.Glyph]], codepages: list[int]) -> Iterable[CoverageReport]:
+def get_codepage_coverage(glyph_sets: Iterable[Iterable['monobit.Glyph']], codepages: list[int]) -> Iterable[CoverageReport]:
+    index = get_codepage_index(codepages)
+    totals = Counter(codepage
+                     for members in index.values()
+                     for codepage in members)
+    glyph_set_counts = [Counter(codepage
+                                for codepoint in codepoints_from_glyphs(glyphs)
+                                for codepage in index.get(codepoint, ()))
+                        for glyphs in glyph_sets]
+
     for number in codepages:
-        total = get_codepage_total(number)
-        counts = [get_codepage_count(glyphs, number) for glyphs in glyph_sets]
-        yield CoverageReport(f"CP{number}", counts, total)
+        counts = [glyph_set_count[number] for glyph_set_count in glyph_set_counts]
+        yield CoverageReport(f"CP{number:03d}", counts, totals[number])
 
 
 # Main script
-parser = ArgumentParser(
-    description="Utility for measuring font charset coverage",
-    epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
-parser.add_argument("input", nargs="*", help="input font files")
-parser.add_argument("--cp", type=int, nargs="*", default=list(),
-                    help="code pages to measure against (none for Unicode block coverage)")
-parser.add_argument("--md", action="store_true",
-                    help="output as Markdown table")
-args = parser.parse_args()
-
-packs = map(monobit.load, args.input)
-fonts: list[monobit.Font] = list(map(lambda pack: pack.get(0), packs))
-glyph_sets = list(map(lambda font: font.glyphs, fonts))
-
-report = list(get_block_coverage(glyph_sets) if len(args.cp) ==
-              0 else get_codepage_coverage(glyph_sets, args.cp))
-width = max(len(block) for block, _, _ in report)
-
-if args.md:
-    first_title = "Unicode block" if len(args.cp) == 0 else "Character set"
-    first_width = max(width, len(first_title))
-    titles = ["Coverage"] if len(fonts) == 1 else [
-        font.family for font in fonts]
-    widths = list(map(len, titles))
-
-    print(f"| {first_title:{width}s} |", end="")
-    for title, width in zip(titles, widths):
-        print(f" {title:>{max(19, width)}s} |", end="")
-    print()
-
-    print("| " + (first_width * "-") + " |", end="")
-    for width in widths:
-        print(" " + (max(19, width) * "-") + " |", end="")
-    print()
-
-    for block, counts, total in report:
-        print(f"| {block:{first_width}s} |", end="")
-        for count in counts:
-            coverage = "-" if count == 0 else f"{100 * count / total:.1f}% ({count}/{total})"
-            print(f" {coverage:>19s} |", end="")
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = ArgumentParser(
+        prog=prog,
+        description="Utility for measuring font charset coverage",
+        epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
+    parser.add_argument("input", nargs="*", help="input font files")
+    parser.add_argument("--cp", nargs="*", default=list(),
+                        help="code pages to measure against, 'all' for every single-byte code page (none for Unicode block coverage)")
+    parser.add_argument("--md", action="store_true",
+                        help="output as Markdown table")
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profiling.enable()
+
+    try:
+        codepages = get_all_codepages() if "all" in args.cp else list(map(int, args.cp))
+    except ValueError:
+        parser.error("code pages must be numbers or 'all'")
+
+    with profiling.stage("parse"):
+        fonts = list(map(load_font, args.input))
+        glyph_sets = list(map(lambda font: font.glyphs, fonts))
+
+    with profiling.stage("measure"):
+        report = list(get_block_coverage(glyph_sets) if len(args.cp) ==
+                      0 else get_codepage_coverage(glyph_sets, codepages))
+    width = max(len(block) for block, _, _ in report)
+
+    if args.md:
+        first_title = "Unicode block" if len(args.cp) == 0 else "Character set"
+        first_width = max(width, len(first_title))
+        titles = ["Coverage"] if len(fonts) == 1 else [
+            font.family for font in fonts]
+        widths = list(map(len, titles))
+
+        print(f"| {first_title:{width}s} |", end="")
+        for title, width in zip(titles, widths):
+            print(f" {title:>{max(19, width)}s} |", end="")
         print()
 
-else:
-    for i, font in enumerate(fonts):
-        print(font.family)
-        for block, counts, total in report:
-            if counts[i] > 0:
-                print(
-                    f"\t{block:{width}s}  {counts[i]:5d}/{total:<5d}  {100 * counts[i] / total:5.1f}%")
+        print("| " + (first_width * "-") + " |", end="")
+        for width in widths:
+            print(" " + (max(19, width) * "-") + " |", end="")
         print()
+
+        for block, counts, total in report:
+            print(f"| {block:{first_width}s} |", end="")
+            for count in counts:
+                coverage = "-" if count == 0 else f"{100 * count / total:.1f}% ({count}/{total})"
+                print(f" {coverage:>19s} |", end="")
+            print()
+
+    else:
+        for i, font in enumerate(fonts):
+            print(font.family)
+            for block, counts, total in report:
+                if counts[i] > 0:
+                    print(
+                        f"\t{block:{width}s}  {counts[i]:5d}/{total:<5d}  {100 * counts[i] / total:5.1f}%")
+            print()
+
+    profiling.report()
+
+
+if __name__ == "__main__":
+    main()
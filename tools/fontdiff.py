@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import re
+import sys
+
+from argparse import ArgumentParser
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from . import profiling
+from .cefo import CelonesFont
+from .cefo2yaff import iter_rasters
+from .yaff import YaffFont, load_font
+
+if TYPE_CHECKING:
+    import monobit
+
+
+# Glyphs are compared by their inked pixels and the position of the ink
+# relative to the glyph origin, so that padding, cropping and bearings
+# which differ between formats do not count as changes.
+INDEX_VERSION = 1
+RASTER_BITS = str.maketrans(".@", "01")
+TAG_PATTERN = re.compile(r"u(?:ni)?([0-9A-Fa-f]{4,6})")
+
+
+def get_glyph_hash(rows: Iterable[str], left: int = 0, bottom: int = 0) -> str:
+    # Rows are strings of '0' and '1', top to bottom
+    rows = list(rows)
+    inked = [i for i, row in enumerate(rows) if "1" in row]
+    if len(inked) == 0:
+        return hashlib.sha1(b"").hexdigest()
+
+    top, last = inked[0], inked[-1]
+    start = min(rows[i].find("1") for i in inked)
+    stop = max(rows[i].rfind("1") for i in inked) + 1
+    position = f"{left + start} {bottom + len(rows) - 1 - last}"
+    bitmap = "\n".join(row[start:stop] for row in rows[top:last + 1])
+    return hashlib.sha1(f"{position}\n{bitmap}".encode()).hexdigest()
+
+
+# Code point to glyph hash indexes
+def index_cefo(filename: str) -> Iterator[tuple[int, str]]:
+    cefo = CelonesFont()
+    cefo.load(filename, mapped=True)
+    try:
+        for codepoint, raster in iter_rasters(cefo):
+            yield codepoint, get_glyph_hash(raster)
+    finally:
+        cefo.close()
+
+
+def index_yaff(font: YaffFont) -> Iterator[tuple[int, str]]:
+    left = int(font.get_property("left-bearing") or 0)
+    bottom = int(font.get_property("shift-up") or 0)
+    for glyph in font.glyphs:
+        glyph_hash = get_glyph_hash((row.translate(RASTER_BITS) for row in glyph.rows), left, bottom)
+        for char in glyph.chars:
+            yield ord(char), glyph_hash
+
+
+def get_monobit_chars(glyph: 'monobit.Glyph') -> list[str]:
+    chars = [char.value for char in glyph.chars if len(char.value) == 1]
+    if len(chars) != 0:
+        return chars
+
+    # Glyphs of font-specific encodings may carry uniXXXX names only
+    matches = (TAG_PATTERN.fullmatch(tag.value) for tag in glyph.tags)
+    return [chr(int(match.group(1), 16)) for match in matches if match is not None]
+
+
+def index_monobit(font: 'monobit.Font') -> Iterator[tuple[int, str]]:
+    font = font.label(char_from="adobe")
+    for glyph in font.glyphs:
+        rows = ("".join(map(str, row)) for row in glyph.as_matrix())
+        glyph_hash = get_glyph_hash(rows, glyph.left_bearing, glyph.shift_up)
+        for char in get_monobit_chars(glyph):
+            yield ord(char), glyph_hash
+
+
+def build_index(filename: str) -> dict[int, str]:
+    if filename.lower().endswith(".cefo"):
+        return dict(index_cefo(filename))
+
+    font = load_font(filename)
+    if isinstance(font, YaffFont):
+        return dict(index_yaff(font))
+
+    return dict(index_monobit(font))
+
+
+# Index cache, keyed by the path and validated by file modification time and size
+def get_index_path(filename: str) -> str:
+    cache_dir = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    key = hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()
+    return os.path.join(cache_dir, "raster-fonts", "diff", f"{key}.json")
+
+
+def get_index(filename: str, cached: bool = True) -> dict[int, str]:
+    stat = os.stat(filename)
+    stamp = [INDEX_VERSION, stat.st_mtime_ns, stat.st_size]
+    path = get_index_path(filename)
+
+    if cached:
+        try:
+            with open(path, encoding="utf-8") as index_file:
+                data = json.load(index_file)
+            if data["stamp"] == stamp:
+                return {int(codepoint): glyph_hash for codepoint, glyph_hash in data["glyphs"].items()}
+        except (OSError, ValueError, KeyError):
+            pass
+
+    index = build_index(filename)
+    if cached:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as index_file:
+                json.dump({"stamp": stamp, "glyphs": index}, index_file)
+        except OSError:
+            pass
+
+    return index
+
+
+# Comparison
+def compare(old: dict[int, str], new: dict[int, str]) -> tuple[list[int], list[int], list[int]]:
+    added = sorted(new.keys() - old.keys())
+    removed = sorted(old.keys() - new.keys())
+    changed = sorted(codepoint for codepoint in old.keys() & new.keys() if old[codepoint] != new[codepoint])
+    return added, removed, changed
+
+
+def format_codepoint(codepoint: int) -> str:
+    char = chr(codepoint)
+    return f"U+{codepoint:04X} {char!r}" if char.isprintable() else f"U+{codepoint:04X}"
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> int:
+    parser = ArgumentParser(
+        prog=prog,
+        description="Utility for comparing the glyphs of YAFF, BDF, Celones Font and other font files",
+        epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
+    parser.add_argument("reference", help="font file the others are compared with")
+    parser.add_argument("fonts", nargs="+", help="font files to compare")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="print only the number of differences")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not read or write the glyph index cache")
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profiling.enable()
+
+    with profiling.stage(f"index {args.reference}"):
+        reference = get_index(args.reference, not args.no_cache)
+
+    different = False
+    for filename in args.fonts:
+        with profiling.stage(f"index {filename}"):
+            index = get_index(filename, not args.no_cache)
+        with profiling.stage(f"compare {filename}"):
+            added, removed, changed = compare(reference, index)
+        if not args.quiet:
+            for sign, codepoints in (("+", added), ("-", removed), ("~", changed)):
+                for codepoint in codepoints:
+                    print(f"{filename}: {sign} {format_codepoint(codepoint)}")
+
+        print(f"{filename}: {len(added)} added, {len(removed)} removed, {len(changed)} changed")
+        different |= len(added) + len(removed) + len(changed) != 0
+
+    profiling.report()
+    return 1 if different else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
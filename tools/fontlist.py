@@ -1,10 +1,234 @@
+import io
+import json
 import os.path
+import struct
 
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from glob import glob
 from itertools import groupby
-from monobit import Font, Pack, load
-from typing import Iterable, NamedTuple
+from typing import Any, BinaryIO, Callable, Iterable, NamedTuple
+
+from . import profiling
+from .yaff import YaffError, is_label, load_font, read
+
+
+# Header-only probes, returning the encodings of the fonts in a file,
+# or None when the file needs a full load
+FON_CHARSETS = {
+    0: "windows-1252",
+    161: "windows-1253",
+    162: "windows-1254",
+    177: "windows-1255",
+    178: "windows-1256",
+    186: "windows-1257",
+    204: "windows-1251",
+    238: "windows-1250",
+}
+
+
+def probe_bdf(stream: BinaryIO) -> list[str] | None:
+    properties = dict()
+    for line in stream:
+        key, _, value = line.decode("latin-1").strip().partition(" ")
+        if key in ("ENDPROPERTIES", "CHARS", "STARTCHAR"):
+            break
+        properties[key] = value.strip('"')
+
+    registry = properties.get("CHARSET_REGISTRY", "")
+    if len(registry) == 0 or registry.upper() == "FONTSPECIFIC":
+        return [""]
+
+    return [f"{registry}-{properties.get('CHARSET_ENCODING', '')}".lower()]
+
+
+def probe_cpi(stream: BinaryIO) -> list[str] | None:
+    header = stream.read(23)
+    if len(header) != 23 or header[:8] not in (b"\xffFONT   ", b"\xffFONT.NT"):
+        return None
+
+    # Code page entries are chained by absolute offsets, or relative ones in FONT.NT
+    relative = header[:8] == b"\xffFONT.NT"
+    info, = struct.unpack_from("<I", header, 19)
+    stream.seek(info)
+    count, = struct.unpack("<H", stream.read(2))
+
+    encodings = list()
+    offset = info + 2
+    for _ in range(count):
+        stream.seek(offset)
+        entry = stream.read(28)
+        if len(entry) != 28:
+            return None
+
+        following, = struct.unpack_from("<I", entry, 2)
+        codepage, = struct.unpack_from("<H", entry, 16)
+        encodings.append(f"cp{codepage}")
+        offset = offset + following if relative else following
+
+    return encodings
+
+
+def probe_fon(stream: BinaryIO) -> list[str] | None:
+    header = stream.read(64)
+    if len(header) != 64 or header[:2] != b"MZ":
+        return None
+
+    # NE resource table, then the charset byte of each FNT resource
+    ne, = struct.unpack_from("<I", header, 60)
+    stream.seek(ne)
+    ne_header = stream.read(64)
+    if len(ne_header) != 64 or ne_header[:2] != b"NE":
+        return None
+
+    resources = ne + struct.unpack_from("<H", ne_header, 36)[0]
+    stream.seek(resources)
+    shift, = struct.unpack("<H", stream.read(2))
+
+    encodings = list()
+    while True:
+        type_id, count, _ = struct.unpack("<HHI", stream.read(8))
+        if type_id == 0:
+            return encodings
+
+        entries = stream.read(12 * count)
+        if type_id != 0x8008:
+            continue
+
+        position = stream.tell()
+        for i in range(count):
+            offset, = struct.unpack_from("<H", entries, 12 * i)
+            stream.seek((offset << shift) + 85)
+            charset = stream.read(1)[0]
+            if charset not in FON_CHARSETS:
+                return None
+            encodings.append(FON_CHARSETS[charset])
+
+        stream.seek(position)
+
+
+PROBES: dict[str, Callable[[BinaryIO], list[str] | None]] = {
+    ".bdf": probe_bdf,
+    ".cpi": probe_cpi,
+    ".fon": probe_fon,
+}
+
+
+def probe_encodings(path: str) -> list[str]:
+    _, ext = os.path.splitext(path)
+    if ext == ".cefo":
+        return [""]
+
+    encodings = None
+    if ext in PROBES:
+        try:
+            with open(path, "rb") as stream:
+                encodings = PROBES[ext](stream)
+        except (struct.error, IndexError, OSError):
+            encodings = None
+
+    if encodings is None:
+        from monobit import load
+        encodings = [str(font.get_property("encoding")) for font in load(path)]
+
+    return encodings
+
+
+def probe_family(path: str) -> str:
+    # Only the header of a YAFF file, up to the first glyph label, is parsed
+    header = list()
+    with open(path, encoding="utf-8") as stream:
+        for line in stream:
+            if is_label(line.rstrip()):
+                break
+            header.append(line)
+
+    try:
+        return read(io.StringIO("".join(header))).family
+    except YaffError:
+        return load_font(path).family
+
+
+# Sidecar metadata cache with a section per kind of probe, as one file may be
+# probed both ways, e.g. x.1250.yaff is a font and a variant of x.yaff.
+# Entries are keyed by path and validated by modification time and size.
+CACHE_NAME = ".fontlist.json"
+CACHE_VERSION = 2
+
+
+def run_probe(probe: Callable[[str], Any], path: str) -> Any:
+    # Files removed since they were listed are left out
+    try:
+        return probe(path)
+    except FileNotFoundError:
+        return None
+
+
+class MetadataCache:
+    path: str
+    sections: dict[str, dict[str, dict]]
+    changed: bool
+
+    def __init__(self, directory: str) -> None:
+        self.path = os.path.join(directory, CACHE_NAME)
+        self.changed = False
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            cache = None
+
+        if isinstance(cache, dict) and cache.get("version") == CACHE_VERSION:
+            self.sections = cache["sections"]
+        else:
+            self.sections = dict()
+
+    def get_stamp(self, path: str) -> list[int] | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def get_many(self, kind: str, paths: Iterable[str], probe: Callable[[str], Any],
+                 jobs: int | None = None) -> dict[str, Any]:
+        # Files missing from the cache or changed since are probed in parallel
+        entries = self.sections.setdefault(kind, dict())
+        result = dict()
+        pending = list()
+        for path in paths:
+            stamp = self.get_stamp(path)
+            if stamp is None:
+                continue
+
+            entry = entries.get(path)
+            if entry is not None and entry["stamp"] == stamp:
+                result[path] = entry["data"]
+            else:
+                pending.append((path, stamp))
+
+        if len(pending) != 0:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                probed = executor.map(partial(run_probe, probe), [path for path, _ in pending])
+                for (path, stamp), data in zip(pending, probed):
+                    if data is not None:
+                        entries[path] = {"stamp": stamp, "data": data}
+                        result[path] = data
+            self.changed = True
+
+        return result
+
+    def save(self) -> None:
+        if not self.changed:
+            return
+
+        try:
+            with open(self.path, "w", encoding="utf-8") as cache_file:
+                json.dump({"version": CACHE_VERSION, "sections": self.sections}, cache_file)
+        except OSError:
+            pass
 
 
 # Font variant detection
@@ -13,21 +237,16 @@ class FontVariant(NamedTuple):
     encoding: str
 
 
-def get_variants_from_pack(pack: Pack, format: str) -> Iterable[FontVariant]:
-    return (FontVariant(format, str(font.get_property("encoding"))) for font in pack)
+def get_variant_files(yaff: str) -> list[str]:
+    prefix, _ = os.path.splitext(yaff)
+    return sorted(file for file in glob(prefix + ".*") if file != yaff)
 
 
-def get_variants(yaff: str) -> Iterable[FontVariant]:
-    prefix, _ = os.path.splitext(yaff)
-    files = list(file for file in glob(prefix + ".*") if file != yaff)
+def get_variants(files: Iterable[str], encodings: dict[str, list[str]]) -> Iterable[FontVariant]:
     for file in files:
         _, ext = os.path.splitext(file)
-        if ext == ".cefo":
-            yield FontVariant(".cefo", "")
-
-        else:
-            for variant in get_variants_from_pack(load(file), ext):
-                yield variant
+        for encoding in encodings.get(file, []):
+            yield FontVariant(ext, encoding)
 
 
 # Pretty formatting variant info
@@ -54,13 +273,39 @@ def get_format_list(variants: Iterable[FontVariant]) -> Iterable[str]:
 
 
 # Main script
-parser = ArgumentParser(
-    description="Utility for listing fonts in a directory",
-    epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
-parser.add_argument("dir", help="input font directory")
-args = parser.parse_args()
-
-for yaff in sorted(glob(os.path.join(args.dir, "*.yaff"))):
-    font: Font = load(yaff).get(0)
-    formats = sorted(["YAFF"] + sorted(get_format_list(get_variants(yaff))))
-    print(f"- {font.family} - {', '.join(formats)}")
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = ArgumentParser(
+        prog=prog,
+        description="Utility for listing fonts in a directory",
+        epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
+    parser.add_argument("dir", help="input font directory")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of files probed in parallel")
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profiling.enable()
+
+    with profiling.stage("probe"):
+        cache = MetadataCache(args.dir)
+        yaffs = sorted(glob(os.path.join(args.dir, "*.yaff")))
+        variant_files = {yaff: get_variant_files(yaff) for yaff in yaffs}
+        families = cache.get_many("families", yaffs, probe_family, args.jobs)
+        encodings = cache.get_many("encodings", (file for files in variant_files.values() for file in files),
+                                   probe_encodings, args.jobs)
+        cache.save()
+
+    for yaff in yaffs:
+        if yaff not in families:
+            continue
+
+        variants = get_variants(variant_files[yaff], encodings)
+        formats = sorted(["YAFF"] + sorted(get_format_list(variants)))
+        print(f"- {families[yaff]} - {', '.join(formats)}")
+
+    profiling.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import asyncio
+import json
+import os
+import socket
+
+from argparse import ArgumentParser
+from typing import Any, Callable, Iterable
+
+from . import profiling
+from .cefo import CelonesFont
+from .measure import TextMetrics
+from .packedfont import PackedFont
+from .render import TextRenderer
+from .yaff2cefo import BitmapFont, GlyphSource
+
+
+# Local font server: fonts are loaded once and shared by all clients.
+# The protocol is newline-delimited JSON. A request is an object with an
+# "op" and an optional "id", which is echoed back with the "result" or
+# "error"; a JSON array of requests is answered with an array of responses.
+# Requests on one connection are answered in order, so they may be pipelined.
+DEFAULT_PORT = 7568
+
+# Limits of request parameters, so that one request cannot exhaust memory.
+# Renderers, each with its own run cache, are kept for a few spacings per font.
+MAX_SPACING = 16
+MAX_RENDER_WIDTH = 1 << 16
+MAX_RENDERERS = 4
+
+
+class FontEntry:
+    path: str
+    stamp: tuple[int, int] | None
+    font: PackedFont
+    _renderers: dict[int, TextRenderer]
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.load()
+
+    def get_stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> None:
+        # The stamp is taken even if loading fails, so a broken file is
+        # reported once and not tried again until it changes
+        self.stamp = self.get_stamp()
+        if self.path.lower().endswith(".cefo"):
+            cefo = CelonesFont()
+            cefo.load(self.path)
+            font = PackedFont.from_cefo(cefo)
+        else:
+            font = BitmapFont(GlyphSource(self.path)).glyphs
+
+        # A file caught while being written may parse as an empty font
+        if len(font) == 0:
+            raise ValueError("Font has no glyphs")
+
+        self.font = font
+        self._renderers = dict()
+
+    def is_outdated(self) -> bool:
+        return self.get_stamp() != self.stamp
+
+    def get_renderer(self, spacing: int) -> TextRenderer:
+        # The least recently used renderer is dropped when there are too many
+        renderer = self._renderers.pop(spacing, None)
+        if renderer is None:
+            renderer = TextRenderer(self.font, spacing)
+            if len(self._renderers) >= MAX_RENDERERS:
+                del self._renderers[next(iter(self._renderers))]
+
+        self._renderers[spacing] = renderer
+        return renderer
+
+
+class FontRegistry:
+    fonts: dict[str, FontEntry]
+
+    def __init__(self) -> None:
+        self.fonts = dict()
+
+    def add(self, name: str, path: str) -> None:
+        self.fonts[name] = FontEntry(path)
+
+    def get(self, name: str) -> FontEntry:
+        if name not in self.fonts:
+            raise ValueError(f"Unknown font: {name}")
+
+        return self.fonts[name]
+
+    def reload(self) -> list[str]:
+        # Fonts that fail to load keep their previous version. Any error is
+        # caught, as monobit raises its own types for malformed files, and an
+        # error escaping here would end the watcher.
+        reloaded = list()
+        for name, entry in self.fonts.items():
+            try:
+                if entry.is_outdated():
+                    entry.load()
+                    reloaded.append(name)
+            except Exception as error:
+                print(f"RELOAD {name}: {str(error) or type(error).__name__}")
+
+        return reloaded
+
+
+# Request handlers
+def get_texts(request: dict[str, Any]) -> tuple[list[str], bool]:
+    # Either a single "text" or a batch of "texts"
+    if "texts" in request:
+        return list(request["texts"]), True
+
+    return [request["text"]], False
+
+
+def get_int(request: dict[str, Any], key: str, default: int | None, low: int, high: int) -> int | None:
+    value = request.get(key, default)
+    if value is None:
+        return None
+
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise ValueError(f"{key} must be an integer from {low} to {high}")
+
+    return value
+
+
+def handle_fonts(registry: FontRegistry, request: dict[str, Any]) -> Any:
+    return sorted(registry.fonts)
+
+
+def handle_glyph(registry: FontRegistry, request: dict[str, Any]) -> Any:
+    font = registry.get(request["font"]).font
+    codepoints = request["codepoints"] if "codepoints" in request else request["text"]
+    return [bitmap.hex() for bitmap in font.lookup_many(codepoints)]
+
+
+def handle_measure(registry: FontRegistry, request: dict[str, Any]) -> Any:
+    metrics = TextMetrics(registry.get(request["font"]).font, get_int(request, "spacing", 0, 0, MAX_SPACING))
+    texts, many = get_texts(request)
+    widths = metrics.measure_many(texts)
+    return widths if many else widths[0]
+
+
+def handle_render(registry: FontRegistry, request: dict[str, Any]) -> Any:
+    renderer = registry.get(request["font"]).get_renderer(get_int(request, "spacing", 0, 0, MAX_SPACING))
+    texts, many = get_texts(request)
+    offset = get_int(request, "offset", 0, -MAX_RENDER_WIDTH, MAX_RENDER_WIDTH)
+    width = get_int(request, "width", None, 0, MAX_RENDER_WIDTH)
+    runs = [renderer.render(text, offset, width).hex() for text in texts]
+    return runs if many else runs[0]
+
+
+HANDLERS: dict[str, Callable[[FontRegistry, dict[str, Any]], Any]] = {
+    "fonts": handle_fonts,
+    "glyph": handle_glyph,
+    "measure": handle_measure,
+    "render": handle_render,
+}
+
+
+def handle_request(registry: FontRegistry, request: Any) -> dict[str, Any]:
+    response: dict[str, Any] = dict()
+    try:
+        if not isinstance(request, dict):
+            raise ValueError("Request must be an object")
+
+        if "id" in request:
+            response["id"] = request["id"]
+
+        if request.get("op") not in HANDLERS:
+            raise ValueError(f"Unknown operation: {request.get('op')}")
+
+        response["result"] = HANDLERS[request["op"]](registry, request)
+    except (KeyError, TypeError, ValueError) as error:
+        response["error"] = str(error)
+    except MemoryError:
+        response["error"] = "Request too large"
+
+    return response
+
+
+def handle_line(registry: FontRegistry, line: bytes) -> bytes:
+    try:
+        request = json.loads(line)
+    except ValueError as error:
+        return json.dumps({"error": f"Invalid JSON: {error}"}).encode() + b"\n"
+
+    if isinstance(request, list):
+        response = [handle_request(registry, item) for item in request]
+    else:
+        response = handle_request(registry, request)
+
+    return json.dumps(response).encode() + b"\n"
+
+
+# Server
+async def serve_client(registry: FontRegistry, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while len(line := await reader.readline()) != 0:
+            if len(line.strip()) != 0:
+                writer.write(handle_line(registry, line))
+                await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def watch(registry: FontRegistry, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        # Fonts are loaded off the event loop, so that clients are still served
+        for name in await asyncio.to_thread(registry.reload):
+            print(f"RELOAD {name}")
+
+
+async def serve(registry: FontRegistry, unix: str | None = None, host: str = "127.0.0.1",
+                port: int = DEFAULT_PORT, interval: float = 1.0) -> None:
+    def client_connected(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Any:
+        return serve_client(registry, reader, writer)
+
+    if unix is not None:
+        server = await asyncio.start_unix_server(client_connected, unix)
+    else:
+        server = await asyncio.start_server(client_connected, host, port)
+
+    watcher = asyncio.create_task(watch(registry, interval))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+# Client
+class FontClient:
+    _socket: socket.socket
+    _stream: Any
+
+    def __init__(self, unix: str | None = None, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+        if unix is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(unix)
+        else:
+            self._socket = socket.create_connection((host, port))
+
+        self._stream = self._socket.makefile("rwb")
+
+    def request_many(self, requests: Iterable[dict[str, Any]]) -> list[Any]:
+        # All requests are sent before the responses are read
+        requests = list(requests)
+        self._stream.writelines(json.dumps(request).encode() + b"\n" for request in requests)
+        self._stream.flush()
+
+        # Every response is read before raising, so the connection stays in sync
+        responses = [json.loads(self._stream.readline()) for _ in requests]
+        for response in responses:
+            if "error" in response:
+                raise ValueError(response["error"])
+
+        return [response["result"] for response in responses]
+
+    def request(self, op: str, **params: Any) -> Any:
+        return self.request_many([dict(op=op, **params)])[0]
+
+    def close(self) -> None:
+        self._stream.close()
+        self._socket.close()
+
+    def __enter__(self) -> 'FontClient':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    parser = ArgumentParser(
+        prog=prog,
+        description="Local server answering glyph, measurement and rendering requests for CeFo and YAFF fonts",
+        epilog="Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
+    parser.add_argument("fonts", nargs="+", metavar="[NAME=]FONT",
+                        help="font files to serve, named after the file unless given a name")
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between checks for changed font files")
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profiling.enable()
+
+    registry = FontRegistry()
+    for font in args.fonts:
+        name, _, path = font.rpartition("=")
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        with profiling.stage(f"load {name}"):
+            registry.add(name, path)
+
+    profiling.report()
+
+    try:
+        asyncio.run(serve(registry, args.unix, args.host, args.port, args.interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
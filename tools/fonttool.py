@@ -0,0 +1,73 @@
+import importlib
+import os.path
+import sys
+
+from typing import NamedTuple
+
+
+# Single entry point for the font tools, also run as 'python -m tools'.
+# Each subcommand is the main() of a tool module, which is only imported
+# when the subcommand runs, so that the tools' dependencies are not loaded
+# for --help or other commands.
+class Command(NamedTuple):
+    module: str
+    help: str
+
+
+COMMANDS = {
+    "bench": Command("bench", "benchmark the CeFo tools on synthetic fonts"),
+    "build": Command("build", "build binary fonts from YAFF files"),
+    "cefo encode": Command("yaff2cefo", "convert YAFF files to Celones Font format"),
+    "cefo decode": Command("cefo2yaff", "convert Celones Font files to YAFF or BDF format"),
+    "coverage": Command("fontcov", "measure font charset coverage"),
+    "diff": Command("fontdiff", "compare the glyphs of font files"),
+    "list": Command("fontlist", "list fonts in a directory"),
+    "serve": Command("fontserver", "serve glyph, measurement and rendering requests"),
+}
+
+
+def get_usage(prog: str) -> str:
+    width = max(map(len, COMMANDS))
+    commands = "\n".join(f"  {name:{width}s}  {command.help}" for name, command in COMMANDS.items())
+    return (f"usage: {prog} <command> [arguments]\n\n"
+            "Utility for building, converting and inspecting raster fonts\n\n"
+            f"commands:\n{commands}\n\n"
+            f"Run '{prog} <command> --help' for the arguments of a command.\n\n"
+            "Copyright (c) Mateusz Karcz, 2026. Shared under the MIT License.")
+
+
+def find_command(argv: list[str]) -> tuple[str, list[str]] | None:
+    # Two-word commands take precedence over one-word ones
+    for words in (2, 1):
+        name = " ".join(argv[:words])
+        if len(argv) >= words and name in COMMANDS:
+            return name, argv[words:]
+
+    return None
+
+
+def run(command: str, argv: list[str], prog: str = "fonttool") -> int | None:
+    # Runs a subcommand in this process, e.g. run("cefo encode", ["a.yaff", "a.cefo"])
+    module = importlib.import_module(f".{COMMANDS[command].module}", __package__)
+    return module.main(argv, f"{prog} {command}")
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> int | None:
+    argv = sys.argv[1:] if argv is None else argv
+    prog = prog or os.path.basename(sys.argv[0])
+
+    found = find_command(argv)
+    if found is None:
+        if argv[:1] in (["-h"], ["--help"]):
+            print(get_usage(prog))
+            return 0
+
+        message = f"unknown command: {' '.join(argv[:2])}" if len(argv) != 0 else "a command is required"
+        print(f"{get_usage(prog)}\n\n{prog}: error: {message}", file=sys.stderr)
+        return 2
+
+    return run(*found, prog)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
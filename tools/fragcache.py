@@ -0,0 +1,146 @@
+import hashlib
+import io
+import json
+import monobit
+import os
+import struct
+
+from glob import glob
+from monobit.core.labels import to_label
+
+
+# Each font is a directory with head.yaff and NNNN-*.yaff glyph fragments.
+# Fragments are parsed together with the header, as it sets glyph defaults,
+# and their glyphs are cached by content hash in a compact binary form.
+CACHE_MAGIC = b"YFC1"
+
+
+def get_fragments(directory: str) -> list[str]:
+    return sorted(glob(os.path.join(directory, "*-*.yaff")))
+
+
+def get_fragment_key(head: bytes, fragment: bytes) -> str:
+    digest = hashlib.sha256(CACHE_MAGIC + monobit.__version__.encode())
+    digest.update(len(head).to_bytes(4, "little") + head)
+    digest.update(fragment)
+    return digest.hexdigest()
+
+
+def parse_yaff(data: bytes) -> monobit.Font:
+    return monobit.load(io.BufferedReader(io.BytesIO(data)), format="yaff").get(0)
+
+
+# Binary glyph serialization
+def _pack_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return struct.pack("<I", len(data)) + data
+
+
+def _check_size(data: bytes, offset: int, size: int) -> None:
+    if offset + size > len(data):
+        raise ValueError("Truncated glyph fragment cache")
+
+
+def _unpack_string(data: bytes, offset: int) -> tuple[str, int]:
+    _check_size(data, offset, 4)
+    length, = struct.unpack_from("<I", data, offset)
+    offset += 4
+    _check_size(data, offset, length)
+    return data[offset:offset + length].decode("utf-8"), offset + length
+
+
+def encode_glyphs(glyphs: list[monobit.Glyph]) -> bytes:
+    result = bytearray(CACHE_MAGIC + struct.pack("<I", len(glyphs)))
+    for glyph in glyphs:
+        labels = [str(label) for label in glyph.get_labels()]
+        result.extend(struct.pack("<H", len(labels)))
+        for label in labels:
+            result.extend(_pack_string(label))
+
+        result.extend(_pack_string(json.dumps(glyph.get_properties(), default=str)))
+
+        bits = "".join("1" if pixel else "0" for row in glyph.as_matrix() for pixel in row)
+        result.extend(struct.pack("<HH", glyph.width, glyph.height))
+        result.extend(int(bits or "0", 2).to_bytes((len(bits) + 7) // 8, "big"))
+
+    return bytes(result)
+
+
+def decode_glyphs(data: bytes) -> list[monobit.Glyph]:
+    # Raises ValueError unless the data holds exactly the glyphs it declares
+    if data[:4] != CACHE_MAGIC or len(data) < 8:
+        raise ValueError("Not a glyph fragment cache")
+
+    count, = struct.unpack_from("<I", data, 4)
+    offset = 8
+
+    glyphs = list()
+    for _ in range(count):
+        _check_size(data, offset, 2)
+        label_count, = struct.unpack_from("<H", data, offset)
+        offset += 2
+        labels = list()
+        for _ in range(label_count):
+            label, offset = _unpack_string(data, offset)
+            labels.append(to_label(label))
+
+        properties, offset = _unpack_string(data, offset)
+
+        _check_size(data, offset, 4)
+        width, height = struct.unpack_from("<HH", data, offset)
+        offset += 4
+        size = (width * height + 7) // 8
+        _check_size(data, offset, size)
+        bits = format(int.from_bytes(data[offset:offset + size], "big"), f"0{width * height}b") if size else ""
+        offset += size
+
+        raster = tuple(bits[row * width:(row + 1) * width] for row in range(height))
+        glyphs.append(monobit.Glyph(raster, labels=labels, **json.loads(properties)))
+
+    if offset != len(data):
+        raise ValueError("Trailing data in glyph fragment cache")
+
+    return glyphs
+
+
+# Cached fragment loading
+def load_fragment(head: bytes, path: str, cache_dir: str) -> list[monobit.Glyph]:
+    with open(path, "rb") as fragment_file:
+        fragment = fragment_file.read()
+
+    cache_path = os.path.join(cache_dir, get_fragment_key(head, fragment) + ".bin")
+    try:
+        with open(cache_path, "rb") as cache_file:
+            return decode_glyphs(cache_file.read())
+    except (OSError, ValueError, struct.error):
+        pass
+
+    # The entry is written under a temporary name and renamed when complete,
+    # so an interrupted build never leaves a truncated entry behind
+    glyphs = list(parse_yaff(head + fragment).glyphs)
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as cache_file:
+            cache_file.write(encode_glyphs(glyphs))
+
+        os.replace(temporary, cache_path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+    return glyphs
+
+
+def load_font(directory: str, cache_dir: str) -> monobit.Font:
+    with open(os.path.join(directory, "head.yaff"), "rb") as head_file:
+        head = head_file.read()
+
+    glyphs = list()
+    for path in get_fragments(directory):
+        glyphs.extend(load_fragment(head, path, cache_dir))
+
+    # Font properties come from the header alone, with a placeholder glyph
+    font = parse_yaff(head + b"u+0000:\n    -\n")
+    return font.modify(glyphs)
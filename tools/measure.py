@@ -0,0 +1,96 @@
+from itertools import accumulate
+from typing import Iterable
+
+from .packedfont import PackedFont
+
+
+# Text metrics computed from the glyph width table, without reading the bitmap.
+# Celones Fonts are measured through PackedFont.from_cefo().
+class TextMetrics:
+    font: PackedFont
+    spacing: int
+
+    def __init__(self, font: PackedFont, spacing: int = 0) -> None:
+        self.font = font
+        self.spacing = spacing
+
+    def get_widths(self, text: str) -> list[int]:
+        get_span = self.font.get_span
+        spans = (get_span(ord(char)) or (0, 0) for char in text)
+        return [stop - start for start, stop in spans]
+
+    def get_advance(self, text: str) -> int:
+        # Width of the text followed by the inter-glyph spacing
+        return sum(self.get_widths(text)) + self.spacing * len(text)
+
+    def measure(self, text: str) -> int:
+        return max(self.get_advance(text) - self.spacing, 0)
+
+    def measure_many(self, texts: Iterable[str]) -> list[int]:
+        return list(map(self.measure, texts))
+
+    def get_prefix_widths(self, text: str) -> list[int]:
+        # Element i is the width of text[:i]
+        advances = list(accumulate(width + self.spacing for width in self.get_widths(text)))
+        return [0] + [advance - self.spacing for advance in advances]
+
+    def break_lines(self, text: str, width: int, optimal: bool = False) -> list[str]:
+        lines = list()
+        for paragraph in text.split("\n"):
+            words = paragraph.split()
+            if len(words) == 0:
+                lines.append("")
+                continue
+
+            advances = list(map(self.get_advance, words))
+            gap = self.get_advance(" ")
+            breaks = (self._break_optimal if optimal else self._break_greedy)(advances, gap, width)
+
+            start = 0
+            for stop in breaks:
+                lines.append(" ".join(words[start:stop]))
+                start = stop
+
+        return lines
+
+    def break_lines_many(self, texts: Iterable[str], width: int, optimal: bool = False) -> list[list[str]]:
+        return [self.break_lines(text, width, optimal) for text in texts]
+
+    def _break_greedy(self, advances: list[int], gap: int, width: int) -> list[int]:
+        breaks = list()
+        line = advances[0]
+        for i, advance in enumerate(advances[1:], 1):
+            if line + gap + advance - self.spacing > width:
+                breaks.append(i)
+                line = advance
+            else:
+                line += gap + advance
+
+        breaks.append(len(advances))
+        return breaks
+
+    def _break_optimal(self, advances: list[int], gap: int, width: int) -> list[int]:
+        # Minimizes the sum of squared slack on all lines but the last one
+        count = len(advances)
+        costs = [0] + [-1] * count
+        previous = [0] * (count + 1)
+        for stop in range(1, count + 1):
+            line = -gap - self.spacing
+            for start in range(stop - 1, -1, -1):
+                line += gap + advances[start]
+                if line > width and start != stop - 1:
+                    break
+
+                slack = 0 if stop == count else max(width - line, 0)
+                cost = costs[start] + slack * slack
+                if costs[stop] < 0 or cost < costs[stop]:
+                    costs[stop] = cost
+                    previous[stop] = start
+
+        breaks = list()
+        stop = count
+        while stop > 0:
+            breaks.append(stop)
+            stop = previous[stop]
+
+        return breaks[::-1]
@@ -0,0 +1,104 @@
+from array import array
+from bisect import bisect_left
+from itertools import groupby
+from typing import Iterable, Iterator
+
+from .cefo import CelonesFont
+
+
+# Struct-of-arrays glyph storage: parallel code point, bitmap offset and width
+# arrays sorted by code point, and one contiguous bitmap buffer.
+# It takes 9 bytes per glyph besides the bitmap, instead of Python objects.
+class PackedFont:
+    codepoints: array
+    offsets: array
+    widths: array
+    bitmap: bytearray | bytes | memoryview
+
+    def __init__(self) -> None:
+        self.codepoints = array("I")
+        self.offsets = array("I")
+        self.widths = array("B")
+        self.bitmap = bytearray()
+
+    @classmethod
+    def from_glyphs(cls, glyphs: Iterable[tuple[int, bytes]]) -> 'PackedFont':
+        font = cls()
+        for codepoint, bitmap in sorted(glyphs, key=lambda glyph: glyph[0]):
+            font.append(codepoint, bitmap)
+
+        return font
+
+    @classmethod
+    def from_cefo(cls, cefo: CelonesFont) -> 'PackedFont':
+        # Shares the bitmap of the Celones Font, only the tables are built.
+        # Long-lived fonts, as in the font server, are kept in this form.
+        font = cls()
+        for prefix in sorted(cefo.blocks):
+            for codepoint, offset, width in cefo.blocks[prefix].get_glyphs():
+                font.codepoints.append(codepoint)
+                font.offsets.append(offset)
+                font.widths.append(width)
+
+        font.bitmap = cefo.bitmap
+        return font
+
+    def append(self, codepoint: int, bitmap: bytes) -> None:
+        if len(self.codepoints) != 0 and codepoint <= self.codepoints[-1]:
+            raise ValueError("Glyphs must be added in increasing code point order")
+
+        self.codepoints.append(codepoint)
+        self.offsets.append(len(self.bitmap))
+        self.widths.append(len(bitmap))
+        self.bitmap.extend(bitmap)
+
+    def find(self, codepoint: int) -> int | None:
+        i = bisect_left(self.codepoints, codepoint)
+        if i == len(self.codepoints) or self.codepoints[i] != codepoint:
+            return None
+
+        return i
+
+    def get_span(self, codepoint: int) -> tuple[int, int] | None:
+        i = self.find(codepoint)
+        if i is None:
+            return None
+
+        return self.offsets[i], self.offsets[i] + self.widths[i]
+
+    def get_bitmap(self, i: int) -> bytes | memoryview:
+        return self.bitmap[self.offsets[i]:self.offsets[i] + self.widths[i]]
+
+    def get_range_bitmap(self, start: int, stop: int) -> bytes | memoryview:
+        # Bitmap of glyphs start..stop-1, which are contiguous when appended
+        if start == stop:
+            return b""
+
+        return self.bitmap[self.offsets[start]:self.offsets[stop - 1] + self.widths[stop - 1]]
+
+    def iter_blocks(self) -> Iterator[tuple[int, int, int]]:
+        # Yields (prefix, start, stop) glyph index ranges of each 16-code point block
+        start = 0
+        for prefix, glyphs in groupby(self.codepoints, lambda codepoint: codepoint >> 4):
+            stop = start + sum(1 for _ in glyphs)
+            yield prefix, start, stop
+            start = stop
+
+    def lookup_many(self, codepoints: Iterable[int] | str) -> list[bytes | memoryview]:
+        if isinstance(codepoints, str):
+            codepoints = map(ord, codepoints)
+
+        get_span, bitmap = self.get_span, self.bitmap
+        spans = (get_span(codepoint) or (0, 0) for codepoint in codepoints)
+        return [bitmap[start:stop] for start, stop in spans]
+
+    def __getitem__(self, codepoint: int) -> bytes | memoryview:
+        i = self.find(codepoint)
+        return self.get_bitmap(i) if i is not None else b""
+
+    def __iter__(self) -> Iterator[tuple[int, bytes | memoryview]]:
+        for i, codepoint in enumerate(self.codepoints):
+            yield codepoint, self.get_bitmap(i)
+
+    def __len__(self) -> int:
+        return len(self.codepoints)
@@ -0,0 +1,119 @@
+from functools import cache
+from types import ModuleType
+from typing import Iterable, Sequence
+
+
+# Glyphs are stored as one byte per column, with the top row in the LSB
+COLUMN_HEIGHT = 8
+
+# Smaller batches are converted in pure Python, which is faster than importing NumPy
+NUMPY_MIN_BATCH = 256
+
+
+Matrix = Sequence[Sequence[int]]
+
+
+@cache
+def get_numpy() -> ModuleType | None:
+    # NumPy is optional and slow to import, so it is only loaded when needed
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    return numpy
+
+
+def _get_width(pixels: Matrix) -> int:
+    return len(pixels[0]) if len(pixels) != 0 else 0
+
+
+def _check_height(height: int) -> None:
+    if height > COLUMN_HEIGHT:
+        raise ValueError(f"Glyphs taller than {COLUMN_HEIGHT} pixels cannot be packed into columns")
+
+
+# Pure-Python implementation
+def _pack_matrix(pixels: Matrix) -> bytes:
+    _check_height(len(pixels))
+    bitmap = bytearray()
+    for column in range(_get_width(pixels)):
+        scanline = 0
+        for row in range(len(pixels)):
+            if pixels[row][column] != 0:
+                scanline |= 1 << row
+
+        bitmap.append(scanline)
+
+    return bytes(bitmap)
+
+
+def _get_scanline(data: bytes, line: int) -> str:
+    mask = 1 << line
+    return "".join("1" if column & mask else "0" for column in data)
+
+
+def _unpack_bitmap(data: bytes, height: int) -> tuple[str, ...]:
+    return tuple(_get_scanline(data, line) for line in range(height))
+
+
+# NumPy implementation
+def _pack_matrices_numpy(matrices: list[Matrix]) -> list[bytes]:
+    numpy = get_numpy()
+    arrays = [numpy.asarray(pixels, dtype=numpy.uint8).reshape(len(pixels), _get_width(pixels))
+              for pixels in matrices]
+    height = max((array.shape[0] for array in arrays), default=0)
+    _check_height(height)
+
+    arrays = [numpy.pad(array, ((0, height - array.shape[0]), (0, 0)))
+              if array.shape[0] != height else array
+              for array in arrays]
+    widths = [array.shape[1] for array in arrays]
+    if sum(widths) == 0:
+        return [b""] * len(arrays)
+
+    pixels = numpy.concatenate(arrays, axis=1) != 0
+    data = numpy.packbits(pixels, axis=0, bitorder="little").tobytes()
+
+    result = list()
+    offset = 0
+    for width in widths:
+        result.append(data[offset:offset + width])
+        offset += width
+
+    return result
+
+
+def _unpack_bitmaps_numpy(bitmaps: list[bytes], height: int) -> list[tuple[str, ...]]:
+    numpy = get_numpy()
+    data = numpy.frombuffer(b"".join(bitmaps), dtype=numpy.uint8)
+    bits = numpy.unpackbits(data[numpy.newaxis, :], axis=0, count=height, bitorder="little")
+    text = (bits + ord("0")).tobytes().decode("ascii")
+    rows = [text[line * len(data):(line + 1) * len(data)] for line in range(height)]
+
+    result = list()
+    offset = 0
+    for bitmap in bitmaps:
+        stop = offset + len(bitmap)
+        result.append(tuple(row[offset:stop] for row in rows))
+        offset = stop
+
+    return result
+
+
+# Batch conversion between pixel matrices and column bytes
+def pack_columns(matrices: Iterable[Matrix]) -> list[bytes]:
+    matrices = list(matrices)
+    if len(matrices) >= NUMPY_MIN_BATCH and get_numpy() is not None:
+        return _pack_matrices_numpy(matrices)
+
+    return [_pack_matrix(pixels) for pixels in matrices]
+
+
+def unpack_columns(bitmaps: Iterable[bytes], height: int = COLUMN_HEIGHT) -> list[tuple[str, ...]]:
+    _check_height(height)
+    bitmaps = [bytes(bitmap) for bitmap in bitmaps]
+    if len(bitmaps) >= NUMPY_MIN_BATCH and get_numpy() is not None:
+        return _unpack_bitmaps_numpy(bitmaps, height)
+
+    return [_unpack_bitmap(bitmap, height) for bitmap in bitmaps]
@@ -0,0 +1,66 @@
+import sys
+import time
+import tracemalloc
+
+from argparse import ArgumentParser
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator, NamedTuple
+
+
+# Opt-in per-stage profiling for the tools' --profile flag. Stages are
+# module-wide, so library code marks them without passing a profiler around;
+# while profiling is disabled, stage() costs one function call.
+class Stage(NamedTuple):
+    name: str
+    seconds: float
+    peak: int
+
+
+_enabled = False
+_stages: list[Stage] = list()
+
+
+def add_argument(parser: ArgumentParser) -> None:
+    parser.add_argument("--profile", action="store_true",
+                        help="print per-stage timings and peak memory to standard error")
+
+
+def enable() -> None:
+    global _enabled
+    if not _enabled:
+        _enabled = True
+        tracemalloc.start()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def _measure(name: str) -> Iterator[None]:
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stages.append(Stage(name, time.perf_counter() - start, tracemalloc.get_traced_memory()[1]))
+
+
+def stage(name: str) -> ContextManager[None]:
+    return _measure(name) if _enabled else nullcontext()
+
+
+def report(title: str = "") -> list[Stage]:
+    # Prints and clears the stages measured so far
+    stages = list(_stages)
+    _stages.clear()
+    if not _enabled:
+        return stages
+
+    prefix = f"{title}: " if len(title) != 0 else ""
+    width = max((len(stage.name) for stage in stages), default=0)
+    total = Stage("total", sum(stage.seconds for stage in stages), max((stage.peak for stage in stages), default=0))
+    for name, seconds, peak in stages + [total]:
+        print(f"PROF  {prefix}{name:{width}s} {seconds:8.3f} s {peak / (1 << 20):9.2f} MiB peak", file=sys.stderr)
+
+    return stages
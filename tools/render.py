@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from .packedfont import PackedFont
+from .packing import COLUMN_HEIGHT, get_numpy
+
+if TYPE_CHECKING:
+    import numpy
+
+
+class RunCache:
+    max_size: int
+    size: int
+    _runs: OrderedDict[str, bytes]
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self._runs = OrderedDict()
+
+    def get(self, text: str) -> bytes | None:
+        run = self._runs.get(text)
+        if run is not None:
+            self._runs.move_to_end(text)
+
+        return run
+
+    def put(self, text: str, run: bytes) -> None:
+        if len(run) > self.max_size:
+            return
+
+        if text in self._runs:
+            self.size -= len(self._runs.pop(text))
+
+        self._runs[text] = run
+        self.size += len(run)
+
+        # Evict least recently used runs until the new one fits
+        while self.size > self.max_size:
+            _, evicted = self._runs.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self) -> None:
+        self._runs.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+
+# Celones Fonts are rendered through PackedFont.from_cefo(), which keeps the
+# glyph table in arrays rather than the per-glyph index of CelonesFont
+class TextRenderer:
+    font: PackedFont
+    spacing: int
+    cache: RunCache
+
+    def __init__(self, font: PackedFont, spacing: int = 0, cache_size: int = 1 << 20) -> None:
+        self.font = font
+        self.spacing = spacing
+        self.cache = RunCache(cache_size)
+
+    def get_run(self, text: str) -> bytes:
+        run = self.cache.get(text)
+        if run is None:
+            run = bytes(self.spacing).join(self.font.lookup_many(text))
+            self.cache.put(text, run)
+
+        return run
+
+    def render(self, text: str, offset: int = 0, width: int | None = None) -> bytes:
+        # Returns columns offset..offset+width of the run, blank outside of it
+        run = self.get_run(text)
+        if width is None:
+            width = max(len(run) - offset, 0)
+
+        lead = min(max(-offset, 0), width)
+        body = run[max(offset, 0):max(offset + width, 0)]
+        return bytes(lead) + body + bytes(width - lead - len(body))
+
+    def render_array(self, text: str, offset: int = 0, width: int | None = None) -> 'numpy.ndarray':
+        numpy = get_numpy()
+        if numpy is None:
+            raise RuntimeError("NumPy is required for framebuffer rendering")
+
+        columns = numpy.frombuffer(self.render(text, offset, width), dtype=numpy.uint8)
+        return numpy.unpackbits(columns[numpy.newaxis, :], axis=0, count=COLUMN_HEIGHT, bitorder="little")
+
+    def draw(self, framebuffer: 'numpy.ndarray', text: str, x: int = 0, y: int = 0, offset: int = 0) -> None:
+        # Sets the text pixels in a (rows, columns) framebuffer, clipped to its bounds
+        height, width = framebuffer.shape
+        if x >= width or y >= height or y + COLUMN_HEIGHT <= 0:
+            return
+
+        left = max(x, 0)
+        pixels = self.render_array(text, offset + left - x, width - left)
+        top = max(y, 0)
+        bottom = min(y + COLUMN_HEIGHT, height)
+        framebuffer[top:bottom, left:] |= pixels[top - y:bottom - y].astype(framebuffer.dtype)
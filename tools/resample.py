@@ -0,0 +1,47 @@
+import monobit
+import unicodedata
+
+from monobit.core.labels import Char
+from monobit.encoding import encoder
+
+
+# Code page variants of one font, resampled in-process. Each character's
+# glyph is looked up once and shared by all code pages mapping it, so a code
+# page costs a pass over its table. Characters the font lacks get the
+# default glyph, as in monobit's resample(), and are reported per code page.
+class CodepageResampler:
+    font: monobit.Font
+    _glyphs: dict[str, monobit.Glyph | None]
+    _default: monobit.Glyph | None
+
+    def __init__(self, font: monobit.Font) -> None:
+        self.font = font
+        self._glyphs = dict()
+        self._default = None
+
+    def get_glyph(self, char: str) -> monobit.Glyph | None:
+        if char not in self._glyphs:
+            self._glyphs[char] = self.font.get_glyph(char=char, missing=None)
+
+        return self._glyphs[char]
+
+    def get_default_glyph(self) -> monobit.Glyph:
+        if self._default is None:
+            self._default = self.font.get_default_glyph()
+
+        return self._default
+
+    def get_missing(self, codepage: int) -> list[str]:
+        # Control characters are not expected to have glyphs
+        table = encoder(f"cp{codepage}").mapping
+        return [char for char in table.values()
+                if not unicodedata.category(char).startswith("C") and self.get_glyph(char) is None]
+
+    def resample(self, codepage: int) -> monobit.Font:
+        encoding = encoder(f"cp{codepage}")
+        glyphs = list()
+        for char in encoding.mapping.values():
+            glyph = self.get_glyph(char) or self.get_default_glyph()
+            glyphs.append(glyph.modify(labels=[Char(char)]))
+
+        return self.font.modify(glyphs).label(codepoint_from=encoding, overwrite=True)
@@ -0,0 +1,234 @@
+import io
+import re
+
+from typing import TYPE_CHECKING, Iterable, TextIO
+
+if TYPE_CHECKING:
+    import monobit
+
+
+# Native reader and writer for the YAFF subset used by the font sources:
+# a header of properties, 'u+XXXX:' and quoted character labels,
+# and rasters made of '.' and '@' (or '-' for an empty glyph).
+# Anything else raises YaffError, and load_font() falls back to monobit.
+class YaffError(ValueError):
+    pass
+
+
+PROPERTY_PATTERN = re.compile(r"([A-Za-z_][A-Za-z0-9_.-]*):\s*(.*)")
+CODEPOINT_PATTERN = re.compile(r"[uU]\+([0-9A-Fa-f]+):")
+CHAR_PATTERN = re.compile(r"'(.+)':")
+
+
+class YaffGlyph:
+    labels: list[str]
+    rows: tuple[str, ...]
+
+    def __init__(self, labels: list[str], rows: Iterable[str]) -> None:
+        self.labels = labels
+        self.rows = tuple(rows)
+
+    @classmethod
+    def from_char(cls, char: str, rows: Iterable[str]) -> 'YaffGlyph':
+        label = f"'{char}'" if char.isprintable() else f"u+{ord(char):04x}"
+        return cls([label], rows)
+
+    @property
+    def chars(self) -> list[str]:
+        return [get_label_char(label) for label in self.labels]
+
+    @property
+    def char(self) -> str:
+        return self.chars[0]
+
+    @property
+    def width(self) -> int:
+        return len(self.rows[0]) if len(self.rows) != 0 else 0
+
+    @property
+    def height(self) -> int:
+        return len(self.rows)
+
+    def as_matrix(self) -> tuple[tuple[int, ...], ...]:
+        return tuple(tuple(int(pixel == "@") for pixel in row) for row in self.rows)
+
+
+class YaffFont:
+    properties: dict[str, str]
+    glyphs: list[YaffGlyph]
+
+    def __init__(self, properties: dict[str, str] | None = None, glyphs: list[YaffGlyph] | None = None) -> None:
+        self.properties = properties if properties is not None else dict()
+        self.glyphs = glyphs if glyphs is not None else list()
+
+    @property
+    def name(self) -> str:
+        return self.properties.get("name", "")
+
+    @property
+    def family(self) -> str:
+        return self.properties.get("family", self.name)
+
+    def get_property(self, key: str) -> str | None:
+        return self.properties.get(key)
+
+
+def get_label_char(label: str) -> str:
+    match = CODEPOINT_PATTERN.fullmatch(label + ":")
+    if match is not None:
+        return chr(int(match.group(1), 16))
+
+    return label[1:-1]
+
+
+def is_label(line: str) -> bool:
+    return CODEPOINT_PATTERN.fullmatch(line) is not None or CHAR_PATTERN.fullmatch(line) is not None
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+
+    return value
+
+
+# Reading
+def read(stream: TextIO) -> YaffFont:
+    font = YaffFont()
+    labels: list[str] = list()
+    rows: list[str] | None = None
+    empty = False
+    multiline: str | None = None
+
+    def finish_glyph() -> None:
+        nonlocal labels, rows, empty
+        if len(labels) != 0:
+            if rows is None:
+                raise YaffError(f"Glyph {labels[0]} has no raster")
+
+            font.glyphs.append(YaffGlyph(labels, rows))
+
+        labels, rows, empty = list(), None, False
+
+    def finish_property() -> None:
+        # A tag label of the first glyph reads as a property with raster rows
+        nonlocal multiline
+        value = font.properties[multiline] if multiline is not None else ""
+        if value == "-" or (len(value) != 0 and len(value.strip(".@\n")) == 0):
+            raise YaffError(f"Property {multiline} holds a raster, tag labels are not supported")
+
+        multiline = None
+
+    for number, line in enumerate(stream, 1):
+        line = line.rstrip()
+        if len(line) == 0:
+            finish_property()
+            finish_glyph()
+            continue
+
+        if line.startswith("#"):
+            continue
+
+        if line == "---":
+            if len(font.properties) != 0 or len(font.glyphs) != 0:
+                raise YaffError("Multiple fonts in one file are not supported")
+            continue
+
+        # Indented lines are rasters or continued property values
+        if line[0].isspace():
+            content = line.strip()
+            if len(labels) != 0:
+                if empty or (content == "-" and rows is not None):
+                    raise YaffError(f"Line {number}: unexpected content after an empty glyph")
+
+                if content == "-":
+                    rows, empty = list(), True
+                elif len(content.strip(".@")) == 0:
+                    rows = rows if rows is not None else list()
+                    if len(rows) != 0 and len(rows[0]) != len(content):
+                        raise YaffError(f"Line {number}: raster rows differ in width")
+                    rows.append(content)
+                else:
+                    raise YaffError(f"Line {number}: glyph properties are not supported")
+
+            elif multiline is not None:
+                value = font.properties[multiline]
+                font.properties[multiline] = content if len(value) == 0 else f"{value}\n{content}"
+
+            else:
+                raise YaffError(f"Line {number}: unexpected indented line")
+
+            continue
+
+        # Unindented lines are labels or properties
+        finish_property()
+        if is_label(line):
+            if rows is not None:
+                finish_glyph()
+            labels.append(line[:-1])
+            continue
+
+        if len(labels) != 0 or len(font.glyphs) != 0:
+            raise YaffError(f"Line {number}: unsupported label or property {line!r}")
+
+        match = PROPERTY_PATTERN.fullmatch(line)
+        if match is None:
+            raise YaffError(f"Line {number}: unsupported line {line!r}")
+
+        key, value = match.group(1), unquote(match.group(2))
+        font.properties[key] = value
+        if len(value) == 0:
+            multiline = key
+
+    finish_property()
+    finish_glyph()
+    return font
+
+
+def load(filename: str) -> YaffFont:
+    with io.open(filename, mode="r", encoding="utf-8") as stream:
+        return read(stream)
+
+
+def load_font(filename: str) -> 'YaffFont | monobit.Font':
+    if filename.lower().endswith(".yaff"):
+        try:
+            return load(filename)
+        except (YaffError, UnicodeDecodeError):
+            pass
+
+    import monobit
+    return monobit.load(filename).get(0)
+
+
+# Writing
+def write_properties(properties: dict[str, str], stream: TextIO) -> None:
+    for key, value in properties.items():
+        if "\n" in value:
+            stream.write(f"{key}:\n")
+            stream.writelines(f"    {line}\n" for line in value.split("\n"))
+        else:
+            stream.write(f"{key}: {value}\n")
+
+    if len(properties) != 0:
+        stream.write("\n")
+
+
+def write_glyph(glyph: YaffGlyph, stream: TextIO) -> None:
+    stream.writelines(f"{label}:\n" for label in glyph.labels)
+    if glyph.width == 0:
+        stream.write("    -\n")
+    else:
+        stream.writelines(f"    {row}\n" for row in glyph.rows)
+    stream.write("\n")
+
+
+def write(font: YaffFont, stream: TextIO) -> None:
+    write_properties(font.properties, stream)
+    for glyph in font.glyphs:
+        write_glyph(glyph, stream)
+
+
+def save(font: YaffFont, filename: str) -> None:
+    with io.open(filename, mode="w", encoding="utf-8") as stream:
+        write(font, stream)
@@ -1,143 +1,195 @@
-import monobit
+import io
+import sys
 
 from argparse import ArgumentParser
-from collections import defaultdict
+from functools import partial
+from typing import TYPE_CHECKING, Collection, Iterable, Iterator
 
-from cefo import *
+from . import batch, profiling
+from .cefo import AccelerationTable, CelonesFont, CelonesFontWriter, FullGlyphBlock, GlyphBlockBase, SparseGlyphBlock
+from .packedfont import PackedFont
+from .packing import pack_columns
+from .yaff import YaffFont, load_font
 
+if TYPE_CHECKING:
+    import monobit
 
-class GlyphSource:
-    filename: str
-    font: monobit.Font
-
-    def __init__(self, filename: str) -> None:
-        self.filename = filename
-        pack: monobit.Pack = monobit.load(self.filename)
-        self.font = pack.get(0)
-
-    def __str__(self) -> str:
-        return f"{self.filename}: {self.font.name} - {len(self.font.glyphs)} glyphs"
-
-    def load(self) -> list[tuple[int, bytearray]]:
-        glyphs = list()
-
-        for glyph in self.font.glyphs:
-            assert isinstance(glyph, monobit.Glyph)
-
-            codepoint = ord(glyph.char)
-            bitmap = bytearray()
-
-            pixels = glyph.as_matrix()
-            for column in range(glyph.width):
-                scanline = 0
-                for row in range(glyph.height):
-                    if pixels[row][column] != 0:
-                        scanline |= 1 << row
-
-                bitmap.append(scanline)
 
-            glyphs.append((codepoint, bitmap))
+# Subsetting keeps the glyphs used by text corpora, and the fallback glyph
+# shown in place of the missing ones
+DEFAULT_FALLBACK = "?"
 
-        return glyphs
 
+def read_corpus_codepoints(paths: Iterable[str], fallback: str = DEFAULT_FALLBACK) -> set[int]:
+    # Corpora are read in chunks, so they may be arbitrarily large
+    codepoints = {ord(fallback)}
+    for path in paths:
+        with io.open(path, mode="r", encoding="utf-8") as corpus:
+            while len(chunk := corpus.read(1 << 16)) != 0:
+                codepoints.update(map(ord, chunk))
 
-class Glyph:
-    codepoint: int
-    bitmap: bytearray
+    return codepoints
 
-    def __init__(self, codepoint: int, bitmap: bytearray) -> None:
-        self.codepoint = codepoint
-        self.bitmap = bitmap
-
-    def __len__(self) -> int:
-        return len(self.bitmap)
 
+class GlyphSource:
+    filename: str
+    font: 'YaffFont | monobit.Font'
 
-class GlyphBlock:
-    prefix: int
-    glyphs: list[Glyph]
+    def __init__(self, filename: str, font: 'YaffFont | monobit.Font | None' = None) -> None:
+        self.filename = filename
+        self.font = font if font is not None else load_font(self.filename)
 
-    def __init__(self, glyphs: list[Glyph]) -> None:
-        self.prefix = glyphs[0].codepoint >> 4
-        self.glyphs = glyphs
+    def __str__(self) -> str:
+        return f"{self.filename}: {self.font.name} - {len(self.font.glyphs)} glyphs"
 
-    def __len__(self) -> int:
-        return len(self.glyphs)
+    def load(self, codepoints: Collection[int] | None = None) -> list[tuple[int, bytes]]:
+        # Only the glyphs in codepoints are packed, when given
+        glyphs = [glyph for glyph in self.font.glyphs
+                  if codepoints is None or ord(glyph.char) in codepoints]
+        codepoints = [ord(glyph.char) for glyph in glyphs]
+        bitmaps = pack_columns(glyph.as_matrix() for glyph in glyphs)
+        return list(zip(codepoints, bitmaps))
 
 
 class BitmapFont:
     name: str
-    glyphs: list[Glyph]
+    glyphs: PackedFont
 
-    class _Iterator:
-        _i: int
-        _font: 'BitmapFont'
-
-        def __init__(self, font: 'BitmapFont') -> None:
-            self._i = 0
-            self._font = font
-
-        def __next__(self) -> Glyph:
-            if self._i >= len(self._font.glyphs):
-                raise StopIteration
-
-            result = self._font.glyphs[self._i]
-            self._i += 1
-            return result
-
-    def __init__(self, source: GlyphSource) -> None:
+    def __init__(self, source: GlyphSource, codepoints: Collection[int] | None = None) -> None:
         self.name = source.font.name
-        self.glyphs = list(sorted(
-            (Glyph(*pair) for pair in source.load()), key=lambda glyph: glyph.codepoint))
-
-    def __iter__(self):
-        return BitmapFont._Iterator(self)
-
-    def get_offset(self, codepoint: int):
-        return sum(len(glyph) for glyph in self.glyphs[:next(i for i, v in enumerate(self.glyphs) if v.codepoint == codepoint)])
+        self.glyphs = PackedFont.from_glyphs(source.load(codepoints))
 
-    def get_blocks(self) -> list[GlyphBlock]:
-        blocks = defaultdict(list)
-        for glyph in self:
-            blocks[glyph.codepoint >> 4].append(glyph)
+    def __iter__(self) -> Iterator[tuple[int, bytes | memoryview]]:
+        return iter(self.glyphs)
 
-        return [GlyphBlock(v) for v in blocks.values()]
+    def get_blocks(self) -> Iterator[tuple[GlyphBlockBase, bytes | memoryview]]:
+        # Glyphs are sorted, so each block is a contiguous run of the bitmap
+        for prefix, start, stop in self.glyphs.iter_blocks():
+            yield self.get_cefo_block(prefix, start, stop), self.glyphs.get_range_bitmap(start, stop)
 
     def to_bitmap(self) -> bytearray:
-        result = bytearray()
-        for glyph in self.glyphs:
-            result.extend(glyph.bitmap)
-
-        return result
-
-
-parser = ArgumentParser(
-    description="Utility for converting YAFF files to Celones Font format",
-    epilog="Copyright (c) Mateusz Karcz, 2022-2026. Shared under the MIT License.")
-parser.add_argument("input", help="input YAFF file")
-parser.add_argument("output", help="output Celones Font file")
-args = parser.parse_args()
-
-source = GlyphSource(args.input)
-font = BitmapFont(source)
-
-cefo = CelonesFont()
-cefo.bitmap = font.to_bitmap()
-
-for block in font.get_blocks():
-    cefo_block: GlyphBlockBase
-    if len(block) == 16:
-        cefo_block = FullGlyphBlock()
-        cefo_block.offset = font.get_offset(block.prefix << 4)
-        cefo_block.widths = [len(glyph) for glyph in block.glyphs]
-    else:
-        cefo_block = SparseGlyphBlock()
-        cefo_block.offset = font.get_offset(
-            (block.prefix << 4) | (block.glyphs[0].codepoint & 0xF))
-        cefo_block.widths = [(glyph.codepoint & 0xF, len(glyph))
-                             for glyph in block.glyphs]
-
-    cefo_block.prefix = block.prefix
-    cefo.blocks[block.prefix] = cefo_block
-
-cefo.store(args.output)
+        return bytearray(self.glyphs.bitmap)
+
+    def get_cefo_block(self, prefix: int, start: int, stop: int) -> GlyphBlockBase:
+        codepoints = self.glyphs.codepoints[start:stop]
+        widths = self.glyphs.widths[start:stop]
+
+        # Full blocks cannot mark glyphs as missing, so only complete blocks use them
+        cefo_block: GlyphBlockBase
+        if stop - start == 16:
+            cefo_block = FullGlyphBlock()
+            cefo_block.widths = list(widths)
+        else:
+            cefo_block = SparseGlyphBlock()
+            cefo_block.widths = [(codepoint & 0xF, width)
+                                 for codepoint, width in zip(codepoints, widths)]
+
+        cefo_block.prefix = prefix
+        cefo_block.offset = self.glyphs.offsets[start]
+        return cefo_block
+
+    def to_cefo(self) -> CelonesFont:
+        # The packed bitmap is already in block order
+        cefo = CelonesFont()
+        cefo.bitmap = self.to_bitmap()
+        cefo.blocks = {block.prefix: block for block, _ in self.get_blocks()}
+        return cefo
+
+    def get_block_sizes(self, index: bool = False) -> Iterator[tuple[GlyphBlockBase, int, int]]:
+        # Yields each block with the bytes of its records and of its bitmap
+        for prefix, start, stop in self.glyphs.iter_blocks():
+            block = self.get_cefo_block(prefix, start, stop)
+            records = type(block).get_cost(stop - start)
+            if index:
+                records += AccelerationTable.get_cost(stop - start)
+            yield block, records, len(self.glyphs.get_range_bitmap(start, stop))
+
+    def write_cefo(self, filename: str, compress: bool = False, index: bool = False,
+                   blocks: Iterable[tuple[GlyphBlockBase, bytes | memoryview]] | None = None) -> CelonesFontWriter:
+        # Streams each block to the file as soon as it is encoded, unless encoded blocks are given
+        with CelonesFontWriter(filename, compress, index) as writer:
+            for block, bitmap in blocks if blocks is not None else self.get_blocks():
+                writer.write_block(block, bitmap)
+
+        return writer
+
+
+def print_subset_report(output: str, font: BitmapFont, codepoints: set[int], index: bool = False) -> None:
+    missing = sorted(codepoint for codepoint in codepoints
+                     if chr(codepoint).isprintable() and font.glyphs.find(codepoint) is None)
+    if len(missing) != 0:
+        print(f"{output}: {len(missing)} characters without glyphs: "
+              + " ".join(f"U+{codepoint:04X}" for codepoint in missing))
+
+    total = 0
+    for block, records, bitmap in font.get_block_sizes(index):
+        kind = "full" if isinstance(block, FullGlyphBlock) else "sparse"
+        first = block.prefix << 4
+        print(f"{output}: U+{first:04X}-U+{first + 15:04X} {kind:6} {records:4} B records, {bitmap:5} B bitmap")
+        total += records + bitmap
+
+    print(f"{output}: {len(font.glyphs)} glyphs, {total} B")
+
+
+def convert(input: str, output: str, compress: bool = False, index: bool = False,
+            subset: set[int] | None = None, fallback: str = DEFAULT_FALLBACK, profile: bool = False) -> None:
+    if profile:
+        profiling.enable()
+
+    with profiling.stage("parse"):
+        source = GlyphSource(input)
+    with profiling.stage("pack"):
+        font = BitmapFont(source, subset)
+
+    if subset is not None:
+        if font.glyphs.find(ord(fallback)) is None:
+            raise ValueError(f"{input}: the fallback glyph {fallback!r} is missing")
+
+        print_subset_report(output, font, subset, index)
+
+    # Blocks are only encoded ahead of writing when the two are timed separately
+    blocks = None
+    if profiling.is_enabled():
+        with profiling.stage("encode"):
+            blocks = list(font.get_blocks())
+
+    with profiling.stage("write"):
+        writer = font.write_cefo(output, compress, index, blocks)
+
+    if compress:
+        saved = f"{writer.bitmap_size - writer.stored_size} saved by compression" if writer.compressed else \
+            "stored uncompressed, as compression would not make it smaller"
+        print(f"{output}: {writer.bitmap_size} bitmap bytes, {saved}")
+
+    profiling.report(output)
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> int:
+    parser = ArgumentParser(
+        prog=prog,
+        description="Utility for converting YAFF files to Celones Font format",
+        epilog="Copyright (c) Mateusz Karcz, 2022-2026. Shared under the MIT License.")
+    parser.add_argument("input", nargs="+",
+                        help="input YAFF file and output Celones Font file, or input files and globs with --output-dir")
+    parser.add_argument("--compress", action="store_true",
+                        help="store the bitmap run-length compressed")
+    parser.add_argument("--index", action="store_true",
+                        help="add the acceleration table, for lookups without walking block widths")
+    parser.add_argument("--subset", action="append", default=None, metavar="CORPUS",
+                        help="keep only the glyphs used by this UTF-8 text file (can be repeated)")
+    parser.add_argument("--fallback", default=DEFAULT_FALLBACK,
+                        help=f"character always kept when subsetting (default: {DEFAULT_FALLBACK})")
+    batch.add_arguments(parser)
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    if len(args.fallback) != 1:
+        parser.error("the fallback must be a single character")
+
+    subset = read_corpus_codepoints(args.subset, args.fallback) if args.subset is not None else None
+    return batch.main(parser, args, partial(convert, compress=args.compress, index=args.index,
+                                            subset=subset, fallback=args.fallback, profile=args.profile), ".cefo")
+
+
+if __name__ == "__main__":
+    sys.exit(main())